@@ -0,0 +1,225 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, Transaction, TransactionRollup
+from money import to_minor, to_major
+from serialization import TRANSACTION_COLUMNS, transaction_row
+
+LARGE_AMOUNT_THRESHOLD = float(os.getenv('SUSPICIOUS_LARGE_AMOUNT', 10000))
+VELOCITY_THRESHOLD = int(os.getenv('SUSPICIOUS_VELOCITY_COUNT', 10))
+WINDOW_HOURS = int(os.getenv('SUSPICIOUS_WINDOW_HOURS', 24))
+TOP_N = int(os.getenv('SUSPICIOUS_TOP_N', 10))
+MAX_WINDOW_HOURS = 24 * 31
+
+_rollup_table = TransactionRollup.__table__
+
+
+def hour_bucket(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _upsert_statement():
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        greatest = func.greatest
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        greatest = func.max  # two-argument max() is scalar in SQLite
+    else:
+        raise RuntimeError(f"Transaction rollups are not supported on {dialect}")
+
+    stmt = insert(_rollup_table)
+    return stmt.on_conflict_do_update(
+        index_elements=['account_id', 'hour'],
+        set_={
+            'count': _rollup_table.c.count + stmt.excluded.count,
+            'total_amount': _rollup_table.c.total_amount + stmt.excluded.total_amount,
+            'max_amount': greatest(_rollup_table.c.max_amount, stmt.excluded.max_amount),
+            'flagged_count': _rollup_table.c.flagged_count + stmt.excluded.flagged_count,
+        }
+    )
+
+
+def record_transactions(rows):
+    """
+    Adds transactions to the hourly rollups of their sending accounts.
+
+    Runs inside the caller's DB transaction, so the rollups commit (or roll
+    back) together with the transaction rows themselves.
+
+    Args:
+        rows (iterable): Dicts with from_account_id, amount (minor units),
+            timestamp and optionally is_flagged.
+    """
+    buckets = {}
+    for row in rows:
+        key = (row['from_account_id'], hour_bucket(row['timestamp']))
+        amount = int(row['amount'])
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = bucket = {'count': 0, 'total_amount': 0, 'max_amount': amount, 'flagged_count': 0}
+        bucket['count'] += 1
+        bucket['total_amount'] += amount
+        bucket['max_amount'] = max(bucket['max_amount'], amount)
+        bucket['flagged_count'] += 1 if row.get('is_flagged') else 0
+    if buckets:
+        db.session.execute(_upsert_statement(), [
+            {'account_id': account_id, 'hour': hour, **bucket}
+            for (account_id, hour), bucket in buckets.items()
+        ])
+
+
+def rollup_time(timestamp, created_at):
+    """The time a transaction is rolled up under; rows written without a timestamp use created_at."""
+    return timestamp if timestamp is not None else created_at
+
+
+def record_flag(transaction):
+    """Counts a newly flagged transaction in its hourly rollup."""
+    timestamp = rollup_time(transaction.timestamp, transaction.created_at)
+    if timestamp is None:
+        return
+    db.session.query(TransactionRollup)\
+        .filter_by(account_id=transaction.from_account_id, hour=hour_bucket(timestamp))\
+        .update({'flagged_count': TransactionRollup.flagged_count + 1}, synchronize_session=False)
+
+
+def rebuild_rollups(batch_size=10000):
+    """Recomputes every rollup from the transaction table, for existing databases."""
+    db.session.query(TransactionRollup).delete()
+    rows = db.session.query(Transaction.from_account_id, Transaction.amount,
+                            Transaction.timestamp, Transaction.created_at, Transaction.is_flagged)\
+        .order_by(Transaction.id).yield_per(batch_size)
+    batch = []
+    for from_account_id, amount, timestamp, created_at, is_flagged in rows:
+        timestamp = rollup_time(timestamp, created_at)
+        if timestamp is None:
+            continue  # no time to bucket it under
+        batch.append({'from_account_id': from_account_id, 'amount': amount,
+                      'timestamp': timestamp, 'is_flagged': is_flagged})
+        if len(batch) >= batch_size:
+            record_transactions(batch)
+            batch = []
+    record_transactions(batch)
+    db.session.commit()
+
+
+class SuspiciousActivityRules:
+    """
+    Thresholds for /admin/analytics/suspicious, defaulting to the SUSPICIOUS_* settings.
+
+    Raises:
+        ValueError: If large_amount is not a finite amount that fits a BIGINT.
+    """
+
+    def __init__(self, large_amount=LARGE_AMOUNT_THRESHOLD, velocity=VELOCITY_THRESHOLD,
+                 window_hours=WINDOW_HOURS, top_n=TOP_N):
+        self.large_amount = large_amount
+        self.large_amount_minor = to_minor(large_amount)
+        self.velocity = velocity
+        self.window_hours = min(max(window_hours, 1), MAX_WINDOW_HOURS)
+        self.top_n = max(top_n, 1)
+
+    @classmethod
+    def from_args(cls, args):
+        """Rules with per-request overrides from the query string; raises ValueError like __init__."""
+        return cls(
+            large_amount=args.get('large_amount', LARGE_AMOUNT_THRESHOLD, type=float),
+            velocity=args.get('velocity', VELOCITY_THRESHOLD, type=int),
+            window_hours=args.get('window_hours', WINDOW_HOURS, type=int),
+            top_n=args.get('top_n', TOP_N, type=int),
+        )
+
+    def to_dict(self):
+        return {
+            'large_amount': self.large_amount,
+            'velocity': self.velocity,
+            'window_hours': self.window_hours,
+            'top_n': self.top_n,
+        }
+
+
+def _account_totals(since):
+    count = func.sum(TransactionRollup.count)
+    total = func.sum(TransactionRollup.total_amount)
+    largest = func.max(TransactionRollup.max_amount)
+    flagged = func.sum(TransactionRollup.flagged_count)
+    query = db.session.query(TransactionRollup.account_id, count, total, largest, flagged)\
+        .filter(TransactionRollup.hour >= since)\
+        .group_by(TransactionRollup.account_id)
+    return query, count, total, largest
+
+
+def _account_dict(row):
+    account_id, count, total, largest, flagged = row
+    return {
+        'account_id': account_id,
+        'transaction_count': int(count),
+        'total_amount': to_major(total),
+        'max_amount': to_major(largest),
+        'flagged_count': int(flagged),
+    }
+
+
+def _large_transactions(account_ids, since, threshold):
+    """Transactions over the threshold, read only for accounts whose rollups show one."""
+    if not account_ids:
+        return []
+    rows = db.session.query(*TRANSACTION_COLUMNS)\
+        .filter(Transaction.from_account_id.in_(account_ids), Transaction.timestamp >= since,
+                Transaction.amount > threshold)\
+        .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+    return [transaction_row(row) for row in rows]
+
+
+def _latest_transactions(account_ids, since):
+    """The latest transaction of each account, like the one row per account the group-by used to return."""
+    if not account_ids:
+        return []
+    latest = db.session.query(func.max(Transaction.id))\
+        .filter(Transaction.from_account_id.in_(account_ids), Transaction.timestamp >= since)\
+        .group_by(Transaction.from_account_id)
+    rows = db.session.query(*TRANSACTION_COLUMNS).filter(Transaction.id.in_(latest)).order_by(Transaction.id)
+    return [transaction_row(row) for row in rows]
+
+
+def suspicious_activity(rules, now=None):
+    """
+    Evaluates the rules against the hourly rollups of the last window_hours.
+
+    The rollups pick the accounts over the large amount and velocity
+    thresholds; only their transactions inside the window are read, so
+    the transaction table is never scanned.
+
+    Returns:
+        dict: large_transactions and frequent_transactions are lists of
+        transaction dicts, as before the rollups; large_amount_accounts,
+        high_velocity_accounts and top_accounts hold per-account window
+        totals.
+    """
+    now = now or datetime.utcnow()
+    since = hour_bucket(now) - timedelta(hours=rules.window_hours - 1)
+    query, count, total, largest = _account_totals(since)
+    threshold = rules.large_amount_minor
+
+    large = [_account_dict(row) for row in query.having(largest > threshold).order_by(largest.desc())]
+    frequent = [_account_dict(row) for row in query.having(count > rules.velocity).order_by(count.desc())]
+    top = query.order_by(total.desc()).limit(rules.top_n)
+    return {
+        'large_transactions': _large_transactions([row['account_id'] for row in large], since, threshold),
+        'frequent_transactions': _latest_transactions([row['account_id'] for row in frequent], since),
+        'rules': rules.to_dict(),
+        'since': since.isoformat(),
+        'large_amount_accounts': large,
+        'high_velocity_accounts': frequent,
+        'top_accounts': [_account_dict(row) for row in top],
+    }
+
+
+if __name__ == "__main__":
+    from main import app
+
+    with app.app_context():
+        rebuild_rollups()
+        print(f"✅ Rebuilt {TransactionRollup.query.count()} transaction rollups")
@@ -0,0 +1,208 @@
+"""
+Bulk import and fraud scoring of historical transactions.
+
+Streams a CSV or Parquet file in chunks, scores every chunk with one model
+call and bulk-inserts the Transaction rows with risk_score/is_flagged set.
+Rows use the raw dataset schema of preprocessing_py.py (Time, User_ID,
+Amount and the categorical columns) plus the sending and receiving account
+numbers. The file must be sorted by Time, like the training data.
+
+Progress is committed together with every chunk, so an interrupted run
+resumes after the last imported chunk when started again. Historical rows
+do not change account balances.
+
+    python backfill.py history.csv --chunk-size 50000
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import insert
+
+from models import db, Account, Transaction, BackfillCheckpoint
+from feature_pipeline import RollingCount24h
+from model_processing import score_frame
+from analytics import record_transactions
+from money import to_minor_array
+
+CHUNK_SIZE = 50000
+FRAUD_THRESHOLD = 0.5
+# Bound on bind parameters per account lookup, below SQLite's limit
+LOOKUP_BATCH = 10000
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE, columns=None, dtype=None):
+    """Yields DataFrames of up to chunk_size rows from a CSV or Parquet file."""
+    if path.endswith(('.parquet', '.pq')):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet files requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns, dtype=dtype)
+
+
+def skip_rows(chunks, n_rows):
+    """Drops the first n_rows rows of a chunk stream."""
+    for chunk in chunks:
+        if n_rows >= len(chunk):
+            n_rows -= len(chunk)
+            continue
+        yield chunk.iloc[n_rows:] if n_rows else chunk
+        n_rows = 0
+
+
+def take_rows(chunks, n_rows):
+    """Keeps only the first n_rows rows of a chunk stream."""
+    for chunk in chunks:
+        if n_rows <= 0:
+            return
+        yield chunk.iloc[:n_rows]
+        n_rows -= len(chunk)
+
+
+class AccountResolver:
+    """Account number to id, looked up once per distinct number."""
+
+    def __init__(self):
+        self._ids = {}
+
+    def resolve(self, account_numbers):
+        missing = list(set(account_numbers.tolist()) - self._ids.keys())
+        for start in range(0, len(missing), LOOKUP_BATCH):
+            batch = missing[start:start + LOOKUP_BATCH]
+            found = dict(db.session.query(Account.account_number, Account.id)
+                         .filter(Account.account_number.in_(batch)))
+            for number in batch:
+                self._ids[number] = found.get(number)
+        return account_numbers.map(self._ids)
+
+
+def _copy_transactions(rows):
+    # COPY is the fastest bulk path on PostgreSQL; it runs in the session's transaction
+    columns = list(rows[0])
+    cursor = db.session.connection().connection.cursor()
+    with cursor.copy(f'COPY "transaction" ({", ".join(columns)}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row([row[column] for column in columns])
+
+
+def insert_transactions(rows):
+    bind = db.session.get_bind()
+    if bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg':
+        _copy_transactions(rows)
+    else:
+        db.session.execute(insert(Transaction), rows)
+
+
+def _save_checkpoint(source, rows_done):
+    checkpoint = db.session.get(BackfillCheckpoint, source) or BackfillCheckpoint(source=source)
+    checkpoint.rows_done = rows_done
+    db.session.add(checkpoint)
+
+
+def import_chunk(chunk, counts, accounts, args):
+    """
+    Scores one chunk and stages its Transaction rows in the session.
+
+    Returns:
+        tuple: (rows inserted, rows flagged, rows skipped for unknown accounts)
+    """
+    from_ids = accounts.resolve(chunk[args.from_account_col].astype(str))
+    to_ids = accounts.resolve(chunk[args.to_account_col].astype(str))
+    known = (from_ids.notna() & to_ids.notna()).to_numpy()
+
+    scores = score_frame(chunk[known], counts[known])
+    flagged = scores > args.threshold
+    amounts = to_minor_array(chunk['Amount'].to_numpy()[known])
+    timestamps = pd.to_datetime(chunk['Time'].to_numpy()[known], unit='s').to_pydatetime()
+    now = datetime.utcnow()
+
+    rows = [
+        {
+            'from_account_id': int(from_id),
+            'to_account_id': int(to_id),
+            'amount': int(amount),
+            'transaction_type': args.transaction_type,
+            'risk_score': float(score),
+            'is_blocked': False,
+            'is_flagged': bool(is_flagged),
+            'flag_reason': "High Fraud Risk" if is_flagged else None,
+            'ml_analysis_timestamp': now,
+            'timestamp': timestamp,
+            'created_at': now,
+            # COPY bypasses the ORM defaults, so every column is set here
+            'updated_at': now,
+        }
+        for from_id, to_id, amount, score, is_flagged, timestamp in zip(
+            from_ids[known].tolist(), to_ids[known].tolist(), amounts.tolist(),
+            scores.tolist(), flagged.tolist(), timestamps)
+    ]
+    if rows:
+        insert_transactions(rows)
+        record_transactions(rows)
+    return len(rows), int(flagged.sum()), int((~known).sum())
+
+
+def backfill(path, args):
+    source = os.path.abspath(path)
+    checkpoint = db.session.get(BackfillCheckpoint, source)
+    rows_done = checkpoint.rows_done if checkpoint else 0
+    rolling = RollingCount24h()
+
+    if rows_done:
+        # Rebuild the 24h windows from the rows already imported
+        print(f"⏩ Resuming {path} after {rows_done} rows")
+        for chunk in take_rows(read_chunks(path, args.chunk_size, columns=['User_ID', 'Time']), rows_done):
+            rolling.update(chunk['User_ID'].to_numpy(), chunk['Time'].to_numpy())
+
+    accounts = AccountResolver()
+    totals = {"imported": 0, "flagged": 0, "skipped": 0}
+    start = time.perf_counter()
+    # Account numbers must stay strings, CSV type inference would drop leading zeros
+    account_dtypes = {args.from_account_col: str, args.to_account_col: str}
+    for chunk in skip_rows(read_chunks(path, args.chunk_size, dtype=account_dtypes), rows_done):
+        counts = rolling.update(chunk['User_ID'].to_numpy(), chunk['Time'].to_numpy())
+        try:
+            imported, flagged, skipped = import_chunk(chunk, counts, accounts, args)
+            rows_done += len(chunk)
+            _save_checkpoint(source, rows_done)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        totals["imported"] += imported
+        totals["flagged"] += flagged
+        totals["skipped"] += skipped
+        elapsed = time.perf_counter() - start
+        print(f"📥 {rows_done} rows done, {totals['imported']} imported, {totals['flagged']} flagged "
+              f"({totals['imported'] / elapsed:.0f} rows/s)")
+
+    totals["seconds"] = round(time.perf_counter() - start, 2)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help="CSV or Parquet (.parquet) file")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--threshold', type=float, default=FRAUD_THRESHOLD)
+    parser.add_argument('--from-account-col', default='From_Account')
+    parser.add_argument('--to-account-col', default='To_Account')
+    parser.add_argument('--transaction-type', default='transfer')
+    args = parser.parse_args(argv)
+
+    from main import app
+
+    with app.app_context():
+        totals = backfill(args.path, args)
+    print(f"✅ Backfill finished: {totals}")
+    return totals
+
+
+if __name__ == "__main__":
+    main()
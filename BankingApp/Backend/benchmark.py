@@ -0,0 +1,271 @@
+"""
+Throughput/latency benchmark for the transfer and fraud-scoring path.
+
+Runs fully in-process against a throwaway SQLite database: synthetic users,
+accounts and transactions are generated, /api/transfer is driven through the
+Flask test client and the consumer drains an in-memory transport. Results are
+written as JSON so runs can be compared between releases.
+
+    python benchmark.py --users 200 --transfers 5000 --output benchmark_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The transfer path must use the in-process queue; set before transport is imported
+os.environ['TRANSFER_TRANSPORT'] = 'memory'
+
+from feature_pipeline import CATEGORICAL_COLS, PIPELINE_PATH  # noqa: E402
+from numpy_model import NUMPY_MODEL_PATH  # noqa: E402
+
+# Synthetic vocabularies for the schema used by preprocessing_py.py
+CATEGORIES = {
+    "Merchant_Category": ["Electronics", "Groceries", "Travel", "Fashion", "Entertainment", "Utilities"],
+    "Transaction_Location": ["Chennai", "Mumbai", "Delhi", "Bangalore", "Hyderabad", "Online"],
+    "Card_Type": ["Visa", "MasterCard", "Rupay", "Amex"],
+    "Device_Type": ["Mobile", "Desktop", "Tablet", "POS"],
+    "Authentication_Method": ["OTP", "PIN", "Biometric", "Password"],
+    "Payment_Gateway": ["Razorpay", "PayU", "Stripe", "Paytm"],
+    "User_Age_Group": ["18-25", "26-35", "36-50", "51+"],
+    "Transaction_Channel": ["Web", "App", "POS", "ATM"],
+}
+
+
+def generate_transactions(n, n_users, seed=0, start_time=0.0):
+    """
+    Synthetic transactions matching the raw dataset schema of preprocessing_py.py.
+
+    Returns:
+        list: Transaction dicts with Transaction_ID, Time, User_ID, Amount and
+        the categorical columns.
+    """
+    rng = np.random.default_rng(seed)
+    times = start_time + np.sort(rng.uniform(0, 7 * 86400, n))
+    users = rng.integers(1, n_users + 1, n)
+    amounts = np.round(rng.lognormal(4, 1.2, n), 2)
+    choices = {col: rng.integers(0, len(CATEGORIES[col]), n) for col in CATEGORICAL_COLS}
+    return [
+        {
+            "Transaction_ID": i + 1,
+            "Time": float(times[i]),
+            "User_ID": int(users[i]),
+            "Amount": float(amounts[i]),
+            **{col: CATEGORIES[col][choices[col][i]] for col in CATEGORICAL_COLS},
+        }
+        for i in range(n)
+    ]
+
+
+def fit_synthetic_pipeline(path, n=5000):
+    """Fits a feature pipeline on synthetic data when no real artifact exists."""
+    import pandas as pd
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
+    from feature_pipeline import FeaturePipeline, NON_FEATURE_COLS
+
+    df = pd.DataFrame(generate_transactions(n, 100, seed=1))
+    df = df.drop(columns=[col for col in NON_FEATURE_COLS if col in df.columns])
+    numerical_cols = [col for col in df.columns if col not in CATEGORICAL_COLS]
+    df = pd.get_dummies(df, columns=CATEGORICAL_COLS, drop_first=True)
+    scaler = StandardScaler()
+    pca = PCA(n_components=min(28, df.shape[1]))
+    pca.fit(scaler.fit_transform(df))
+    FeaturePipeline.from_fitted(df.columns, numerical_cols, scaler, pca).save(path)
+
+
+def summarize(samples_ms):
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    if samples.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(samples.size),
+        "mean_ms": round(float(samples.mean()), 4),
+        "p50_ms": round(float(np.percentile(samples, 50)), 4),
+        "p95_ms": round(float(np.percentile(samples, 95)), 4),
+        "p99_ms": round(float(np.percentile(samples, 99)), 4),
+    }
+
+
+def create_app(db_path):
+    from flask import Flask
+    from flask_jwt_extended import JWTManager
+    from models import db
+    from database import init_db
+    from routes import api
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'benchmark-secret-key-benchmark-secret'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app, f'sqlite:///{db_path}')
+    JWTManager(app)
+    app.register_blueprint(api, url_prefix='/api')
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_accounts(app, n_users, initial_balance):
+    """Creates one user with two accounts per synthetic User_ID and returns tokens and account numbers."""
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import insert
+    from models import db, User, Account
+    from money import to_minor
+
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': ''}
+            for i in range(1, n_users + 1)
+        ])
+        db.session.execute(insert(Account), [
+            {'account_number': f'{i:06d}{j:06d}', 'balance': to_minor(initial_balance),
+             'account_type': 'Savings', 'user_id': i}
+            for i in range(1, n_users + 1) for j in range(2)
+        ])
+        db.session.commit()
+        tokens = {i: create_access_token(identity=str(i)) for i in range(1, n_users + 1)}
+    accounts = {i: [f'{i:06d}{j:06d}' for j in range(2)] for i in range(1, n_users + 1)}
+    return tokens, accounts
+
+
+def bench_stages(transactions, batch_sizes, repeats):
+    """Feature build and inference latency per call, per batch size."""
+    from model_processing import build_batch_features, predict_fraud
+
+    results = {}
+    for batch_size in batch_sizes:
+        batch = transactions[:batch_size]
+        counts = np.ones(len(batch))
+        feature_ms, inference_ms = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            features = build_batch_features(batch, counts)
+            built = time.perf_counter()
+            predict_fraud(features)
+            feature_ms.append((built - start) * 1000)
+            inference_ms.append((time.perf_counter() - built) * 1000)
+        results[str(batch_size)] = {
+            "features": summarize(feature_ms),
+            "inference": summarize(inference_ms),
+            "rows_per_sec": round(batch_size * repeats / ((sum(feature_ms) + sum(inference_ms)) / 1000), 1),
+        }
+    return results
+
+
+def bench_api(app, transactions, tokens, accounts):
+    """Drives POST /api/transfer through the Flask test client."""
+    client = app.test_client()
+    latencies = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for transaction in transactions:
+            user_id = transaction['User_ID']
+            payload = {**transaction, 'from_account': accounts[user_id][0],
+                       'to_account': accounts[user_id][1], 'amount': transaction['Amount']}
+            sent = time.perf_counter()
+            response = client.post('/api/transfer', json=payload,
+                                   headers={'Authorization': f'Bearer {tokens[user_id]}'})
+            latencies.append((time.perf_counter() - sent) * 1000)
+            if response.status_code != 202:
+                raise RuntimeError(f"/api/transfer returned {response.status_code}: {response.get_json()}")
+    elapsed = time.perf_counter() - start
+    return {"requests_per_sec": round(len(transactions) / elapsed, 1), "latency": summarize(latencies)}
+
+
+def bench_consumer(app, expected):
+    """Drains the in-memory transport through the consumer's batch loop."""
+    import transfer_consumer
+    from transport import get_transport
+
+    transport = get_transport()
+    transport.subscribe(transfer_consumer.TRANSFER_TOPIC, transfer_consumer.CONSUMER_GROUP)
+    stages = {"features": [], "inference": [], "commit": []}
+    batch_sizes = []
+    processed = 0
+    start = time.perf_counter()
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        while processed < expected:
+            messages = transfer_consumer.poll_batch(transport)
+            if not messages:
+                continue
+            for stage, ms in transfer_consumer.process_batch(messages).items():
+                stages[stage].append(ms)
+            transport.commit()
+            processed += len(messages)
+            batch_sizes.append(len(messages))
+    elapsed = time.perf_counter() - start
+    return {
+        "transfers_per_sec": round(processed / elapsed, 1),
+        "batches": len(batch_sizes),
+        "mean_batch_size": round(float(np.mean(batch_sizes)), 1) if batch_sizes else 0,
+        "per_batch": {stage: summarize(samples) for stage, samples in stages.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--transfers', type=int, default=2000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 256])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args(argv)
+    output = os.path.abspath(args.output)
+
+    workdir = tempfile.mkdtemp(prefix='securex-bench-')
+    try:
+        # Model artifacts are loaded relative to the working directory
+        shutil.copy(os.path.join(BACKEND_DIR, NUMPY_MODEL_PATH), workdir)
+        pipeline_source = os.path.join(BACKEND_DIR, PIPELINE_PATH)
+        if os.path.exists(pipeline_source):
+            shutil.copy(pipeline_source, workdir)
+        os.chdir(workdir)
+        if not os.path.exists(PIPELINE_PATH):
+            fit_synthetic_pipeline(PIPELINE_PATH)
+
+        from model_processing import warm_up_models
+        with contextlib.redirect_stdout(io.StringIO()):
+            warm_up = warm_up_models()
+
+        transactions = generate_transactions(args.transfers, args.users, seed=args.seed)
+        app = create_app(os.path.join(workdir, 'benchmark.db'))
+        tokens, accounts = seed_accounts(app, args.users, initial_balance=1e9)
+
+        results = {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": vars(args),
+            "warm_up": warm_up,
+            "stages": bench_stages(transactions, args.batch_sizes, args.repeats),
+            "api_transfer": bench_api(app, transactions, tokens, accounts),
+            "consumer": bench_consumer(app, len(transactions)),
+        }
+    finally:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({
+        "api_transfer_rps": results["api_transfer"]["requests_per_sec"],
+        "api_transfer_p99_ms": results["api_transfer"]["latency"]["p99_ms"],
+        "consumer_tps": results["consumer"]["transfers_per_sec"],
+    }, indent=2))
+    print(f"Results written to {output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models import db
+
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///banking.db')
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+# psycopg 3 switches a statement to a server-side prepared statement after this many executions
+PG_PREPARE_THRESHOLD = int(os.getenv('PG_PREPARE_THRESHOLD', 5))
+
+
+def database_uri(url=DATABASE_URL):
+    """Normalizes DATABASE_URL; bare postgres URLs use the psycopg 3 driver."""
+    for prefix in ('postgres://', 'postgresql://'):
+        if url.startswith(prefix):
+            return 'postgresql+psycopg://' + url[len(prefix):]
+    return url
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the database profile of the given URI."""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        # Writers wait on the lock in SQLite itself (busy_timeout) instead of failing
+        return {
+            'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000, 'check_same_thread': False},
+        }
+
+    options = {
+        'pool_size': POOL_SIZE,
+        'max_overflow': MAX_OVERFLOW,
+        'pool_timeout': POOL_TIMEOUT,
+        'pool_recycle': POOL_RECYCLE,
+        'pool_pre_ping': True,
+    }
+    if url.get_driver_name() == 'psycopg':
+        options['connect_args'] = {'prepare_threshold': PG_PREPARE_THRESHOLD}
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run concurrently with the single writer; NORMAL only
+    # syncs at checkpoints, which is still durable against application crashes
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.close()
+
+
+def init_db(app, uri=None):
+    """Configures the database profile on the app and binds db to it."""
+    uri = database_uri(uri or app.config.get('SQLALCHEMY_DATABASE_URI') or DATABASE_URL)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(uri))
+    db.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _set_sqlite_pragmas)
@@ -1,16 +1,116 @@
+import os
+import threading
+import time
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from models import User
+from sqlalchemy import event
+from models import db, User, Account
+
+# Seconds a user's role / an account's owner is trusted without a query; 0 disables
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', 30))
+
+
+class TTLCache:
+    """
+    Small thread-safe cache whose entries expire after ttl seconds.
+
+    Entries are also dropped explicitly when the row they describe is written,
+    so the TTL only bounds staleness for writes made by other processes.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, key, value):
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_roles = TTLCache(AUTH_CACHE_TTL)
+account_owners = TTLCache(AUTH_CACHE_TTL)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user_role(mapper, connection, user):
+    user_roles.invalidate(user.id)
+
+
+@event.listens_for(Account, 'after_update')
+@event.listens_for(Account, 'after_delete')
+def _invalidate_account_owner(mapper, connection, account):
+    account_owners.invalidate(account.id)
+
+
+def current_user_id():
+    """The authenticated user's id as an int, parsed once per request."""
+    if 'user_id' not in g:
+        g.user_id = int(get_jwt_identity())
+    return g.user_id
+
+
+def current_user():
+    """The authenticated User, loaded at most once per request."""
+    if 'user' not in g:
+        g.user = db.session.get(User, current_user_id())
+    return g.user
+
+
+def get_account(account_id):
+    """The Account being accessed, shared between the decorator and the handler."""
+    account_id = int(account_id)
+    account = g.get('account')
+    if account is None or account.id != account_id:
+        account = g.account = db.session.get(Account, account_id)
+    return account
+
+
+def _user_role():
+    role = user_roles.get(current_user_id())
+    if role is None:
+        user = current_user()
+        if user is None:
+            return None
+        role = user.role
+        user_roles.set(user.id, role)
+    return role
+
+
+def _account_owner(account_id):
+    owner = account_owners.get(account_id)
+    if owner is None:
+        account = get_account(account_id)
+        if account is None:
+            return None
+        owner = account.user_id
+        account_owners.set(account.id, owner)
+    return owner
+
 
 def admin_required():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
-            if user.role != 'admin':
+            if _user_role() != 'admin':
                 return jsonify({"msg": "Admin access required"}), 403
             return fn(*args, **kwargs)
         return decorator
@@ -21,12 +121,11 @@ def user_account_access():
         @wraps(fn)
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            account_id = kwargs.get('account_id')
-            
-            from models import Account
-            account = Account.query.get(account_id)
-            if not account or account.user_id != user_id:
+            try:
+                account_id = int(kwargs.get('account_id'))
+            except (TypeError, ValueError):
+                return jsonify({"msg": "Unauthorized access"}), 403
+            if _account_owner(account_id) != current_user_id():
                 return jsonify({"msg": "Unauthorized access"}), 403
             return fn(*args, **kwargs)
         return decorator
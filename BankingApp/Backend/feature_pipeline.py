@@ -0,0 +1,218 @@
+import numpy as np
+
+# Artifact written by preprocessing_py.py, kept next to the Keras model
+PIPELINE_PATH = "fraud_feature_pipeline.npz"
+
+CATEGORICAL_COLS = ["Merchant_Category", "Transaction_Location", "Card_Type",
+                    "Device_Type", "Authentication_Method", "Payment_Gateway",
+                    "User_Age_Group", "Transaction_Channel"]
+
+# Columns that are never fed to the scaler/PCA
+NON_FEATURE_COLS = ["Transaction_ID", "Time", "Transaction_Timestamp", "Transaction_Count_24H"]
+
+N_COMPONENTS = 28
+
+DAY_SECONDS = 86400
+
+
+class FeaturePipeline:
+    """
+    Pre-fitted fraud feature pipeline (one-hot -> StandardScaler -> PCA).
+
+    The scaler and PCA are fitted once offline and folded into a single
+    affine map, so scoring a transaction online is one NumPy matrix product
+    instead of fitting sklearn objects per request.
+    """
+
+    def __init__(self, feature_columns, numerical_cols, weights, bias):
+        self.feature_columns = list(feature_columns)
+        self.numerical_cols = list(numerical_cols)
+        self.weights = np.asarray(weights)
+        self.bias = np.asarray(bias)
+        self._index = {name: i for i, name in enumerate(self.feature_columns)}
+        self._numerical_index = [(name, self._index[name]) for name in self.numerical_cols]
+
+    @property
+    def n_features(self):
+        """Width of the model input: PCA components plus transaction frequency."""
+        return self.weights.shape[1] + 1
+
+    @classmethod
+    def from_fitted(cls, feature_columns, numerical_cols, scaler, pca):
+        """
+        Builds the pipeline from a fitted StandardScaler and PCA.
+
+        Args:
+            feature_columns (list): Column order after one-hot encoding.
+            numerical_cols (list): Raw numeric columns copied from the transaction.
+            scaler (StandardScaler): Scaler fitted on the one-hot encoded data.
+            pca (PCA): PCA fitted on the scaled data.
+
+        Returns:
+            FeaturePipeline: The folded pipeline.
+        """
+        components = pca.components_ / scaler.scale_
+        weights = components.T
+        bias = -(scaler.mean_ / scaler.scale_ + pca.mean_) @ pca.components_.T
+        return cls(feature_columns, numerical_cols, weights, bias)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            arrays["feature_columns"].tolist(),
+            arrays["numerical_cols"].tolist(),
+            arrays["weights"],
+            arrays["bias"],
+        )
+
+    @classmethod
+    def load(cls, path=PIPELINE_PATH):
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls.from_arrays(artifact)
+
+    def save(self, path=PIPELINE_PATH):
+        np.savez(
+            path,
+            feature_columns=np.array(self.feature_columns, dtype=str),
+            numerical_cols=np.array(self.numerical_cols, dtype=str),
+            weights=self.weights,
+            bias=self.bias,
+        )
+
+    def encode(self, transactions):
+        """
+        One-hot encodes raw transactions into the fitted column layout.
+
+        Categories that were dropped (drop_first) or never seen during fitting
+        encode to all zeros, exactly like pd.get_dummies on the training data.
+        """
+        encoded = np.zeros((len(transactions), len(self.feature_columns)), dtype=np.float64)
+        for row, transaction in enumerate(transactions):
+            for name, col in self._numerical_index:
+                encoded[row, col] = float(transaction.get(name) or 0.0)
+            for name in CATEGORICAL_COLS:
+                col = self._index.get(f"{name}_{transaction.get(name)}")
+                if col is not None:
+                    encoded[row, col] = 1.0
+        return encoded
+
+    def transform(self, transactions, transaction_counts):
+        """
+        Turns raw transactions into model inputs.
+
+        Args:
+            transactions (list): Transaction dicts.
+            transaction_counts (list): Transaction_Count_24H per transaction.
+
+        Returns:
+            np.ndarray: Array of shape (n, 29) with V1..V28 and Transaction_Frequency.
+        """
+        features = np.empty((len(transactions), self.n_features), dtype=np.float32)
+        features[:, :-1] = self.encode(transactions) @ self.weights + self.bias
+        features[:, -1] = transaction_counts
+        return features
+
+    def encode_frame(self, frame):
+        """Column-wise encode() for a pandas DataFrame of raw transactions, for bulk scoring."""
+        encoded = np.zeros((len(frame), len(self.feature_columns)), dtype=np.float64)
+        for name, col in self._numerical_index:
+            if name in frame:
+                encoded[:, col] = frame[name].to_numpy(dtype=np.float64, na_value=0.0)
+        rows = np.arange(len(frame))
+        for name in CATEGORICAL_COLS:
+            if name not in frame:
+                continue
+            cols = (name + "_" + frame[name].astype(str)).map(self._index).to_numpy(dtype=np.float64)
+            known = ~np.isnan(cols)
+            encoded[rows[known], cols[known].astype(np.intp)] = 1.0
+        return encoded
+
+    def transform_frame(self, frame, transaction_counts):
+        """transform() for a pandas DataFrame of raw transactions."""
+        features = np.empty((len(frame), self.n_features), dtype=np.float32)
+        features[:, :-1] = self.encode_frame(frame) @ self.weights + self.bias
+        features[:, -1] = transaction_counts
+        return features
+
+    def transform_one(self, transaction_data, transaction_count):
+        return self.transform([transaction_data], [transaction_count])
+
+
+def rolling_count_24h(users, times):
+    """
+    Transaction_Count_24H for every row: rows of the same user in the window
+    (time - 24h, time], up to and including the row itself. Equal to
+    groupby(user).rolling("1D").count() on time-ordered data, without a
+    Python call per user.
+
+    Rows are sorted once by (user, time, position). The start of each row's
+    window is found by sorting the rows together with one probe per row at
+    (user, time - 24h) and counting the rows at or before each probe, which
+    is an exact searchsorted over the (user, time) pairs.
+
+    Args:
+        users (np.ndarray): User id per row.
+        times (np.ndarray): Time in seconds per row.
+
+    Returns:
+        np.ndarray: int64 count per row, in input order.
+    """
+    users = np.asarray(users)
+    times = np.asarray(times, dtype=np.float64)
+    n = len(users)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = np.lexsort((np.arange(n), times, users))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+
+    # Probes sort after rows with the same (user, time), like side='right'
+    is_probe = np.repeat([False, True], n)
+    merged = np.lexsort((is_probe, np.concatenate([times, times - DAY_SECONDS]), np.concatenate([users, users])))
+    rows_before = np.cumsum(~is_probe[merged])
+    probes = is_probe[merged]
+    expired = np.empty(n, dtype=np.int64)
+    expired[merged[probes] - n] = rows_before[probes]
+
+    return rank - expired + 1
+
+
+class RollingCount24h:
+    """
+    Transaction_Count_24H over a stream of time-ordered chunks.
+
+    Rows from the last 24h of every user are carried into the next chunk, so
+    counts are identical to rolling_count_24h() over the whole dataset.
+    """
+
+    def __init__(self):
+        self._users = None
+        self._times = None
+
+    def update(self, users, times):
+        users = np.asarray(users)
+        times = np.asarray(times, dtype=np.float64)
+        n_carried = 0
+        if self._users is not None:
+            n_carried = len(self._users)
+            users = np.concatenate([self._users, users])
+            times = np.concatenate([self._times, times])
+
+        # Per user, rows must arrive in time order, as rolling("1D") requires
+        order = np.lexsort((np.arange(len(users)), users))
+        sorted_times = times[order]
+        same_user = users[order][1:] == users[order][:-1]
+        if np.any(same_user & (np.diff(sorted_times) < 0)):
+            raise ValueError("Input is not sorted by Time within each User_ID")
+
+        counts = rolling_count_24h(users, times)[n_carried:]
+
+        # Carry the rows that can still fall inside a later row's window
+        segment = np.concatenate([[0], np.cumsum(~same_user)])
+        last_time = np.empty(len(users))
+        last_time[order] = sorted_times[np.append(~same_user, True)][segment]
+        keep = times > last_time - DAY_SECONDS
+        self._users = users[keep]
+        self._times = times[keep]
+        return counts
@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+# Every worker imports main and opens its own connection pool; the app is not
+# preloaded so no database connection is shared across a fork
+preload_app = False
+
+
+def on_starting(server):
+    # Migrate once in the master before any worker boots; workers only connect
+    import migrate
+    migrate.main()
+
+
+# The in-memory transport and its consumer thread live inside one process, and
+# the ledger needs a single writer per partition
+if os.getenv('TRANSFER_TRANSPORT') == 'memory':
+    workers = 1
@@ -0,0 +1,123 @@
+import os
+import threading
+import numpy as np
+from numpy_model import NumpyFraudModel, NUMPY_MODEL_PATH, export_numpy_weights
+from model_registry import load_arrays
+
+# TensorFlow is only imported by the Keras/TFLite backends, so processes
+# scoring with the NumPy export never pay for it
+
+MODEL_PATH = "credit_card_fraud_detect_NN_model.keras"
+TFLITE_MODEL_PATH = "credit_card_fraud_detect_NN_model.tflite"
+
+# Rows kept preallocated per thread; larger batches fall back to a fresh array
+MAX_BATCH_SIZE = 512
+
+
+class CompiledFraudModel:
+    """
+    Graph-mode wrapper around the Keras fraud model.
+
+    The forward pass is traced once as a tf.function with a fixed
+    [None, n_features] float32 signature, so scoring skips the data adapter
+    and callback setup that Model.predict performs on every call.
+    """
+
+    def __init__(self, keras_model, max_batch_size=MAX_BATCH_SIZE):
+        import tensorflow as tf
+        self.n_features = keras_model.input_shape[-1]
+        self.max_batch_size = max_batch_size
+        self._forward = tf.function(
+            lambda inputs: keras_model(inputs, training=False),
+            input_signature=[tf.TensorSpec([None, self.n_features], tf.float32)],
+        )
+        self._local = threading.local()
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, **kwargs):
+        return cls(load_keras_model(path), **kwargs)
+
+    def _inputs(self, features):
+        features = np.asarray(features)
+        rows = len(features)
+        if rows > self.max_batch_size:
+            return features.astype(np.float32, copy=False)
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty((self.max_batch_size, self.n_features), dtype=np.float32)
+        buffer[:rows] = features
+        return buffer[:rows]
+
+    def predict(self, features):
+        """
+        Args:
+            features (np.ndarray): Model inputs of shape (n, n_features).
+
+        Returns:
+            np.ndarray: Fraud probabilities of shape (n, 1), like Model.predict.
+        """
+        return self._forward(self._inputs(features)).numpy()
+
+
+class TFLiteFraudModel:
+    """Runs the exported TFLite artifact, with tflite_runtime if it is installed."""
+
+    def __init__(self, path=TFLITE_MODEL_PATH):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self._interpreter = Interpreter(model_path=path)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self.n_features = self._input["shape"][-1]
+        self._rows = 1
+        self._lock = threading.Lock()
+
+    def predict(self, features):
+        features = np.asarray(features, dtype=np.float32)
+        with self._lock:
+            if len(features) != self._rows:
+                self._interpreter.resize_tensor_input(self._input["index"], [len(features), self.n_features])
+                self._interpreter.allocate_tensors()
+                self._rows = len(features)
+            self._interpreter.set_tensor(self._input["index"], features)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output["index"]).copy()
+
+
+def load_keras_model(path=MODEL_PATH):
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+def export_tflite(keras_model, path=TFLITE_MODEL_PATH):
+    """Converts the trained Keras model into a TFLite flatbuffer."""
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+    return path
+
+
+def load_fraud_model(mmap=False):
+    """
+    Picks the lightest available backend: the NumPy export, then the TFLite
+    artifact, then the compiled Keras model.
+
+    Args:
+        mmap (bool): Memory-map the NumPy weights so forked workers share them.
+    """
+    if os.path.exists(NUMPY_MODEL_PATH):
+        return NumpyFraudModel.from_arrays(load_arrays(NUMPY_MODEL_PATH, mmap=mmap))
+    if os.path.exists(TFLITE_MODEL_PATH):
+        return TFLiteFraudModel(TFLITE_MODEL_PATH)
+    return CompiledFraudModel.load(MODEL_PATH)
+
+
+if __name__ == "__main__":
+    keras_model = load_keras_model(MODEL_PATH)
+    print(f"Exported {export_numpy_weights(keras_model, NUMPY_MODEL_PATH)}")
+    print(f"Exported {export_tflite(keras_model, TFLITE_MODEL_PATH)}")
@@ -0,0 +1,279 @@
+import os
+import time
+from sqlalchemy import insert, update, bindparam
+from sqlalchemy.exc import DBAPIError
+from datetime import datetime
+from models import db, Account, Transaction, TransferRequest, LedgerOffset
+from analytics import record_transactions
+
+# Transfer outcomes
+COMPLETED = 'completed'
+REJECTED_FRAUD = 'rejected_fraud'
+UNKNOWN_ACCOUNT = 'unknown_account'
+UNAUTHORIZED = 'unauthorized'
+INSUFFICIENT_FUNDS = 'insufficient_funds'
+
+# Transfers per DB transaction; bounds how long account rows (SQLite: the database) stay write-locked
+COMMIT_GROUP_SIZE = int(os.getenv('LEDGER_COMMIT_GROUP_SIZE', 64))
+MAX_RETRIES = int(os.getenv('LEDGER_MAX_RETRIES', 5))
+RETRY_BACKOFF_MS = int(os.getenv('LEDGER_RETRY_BACKOFF_MS', 20))
+# PostgreSQL serialization_failure and deadlock_detected
+_RETRYABLE_SQLSTATES = {'40001', '40P01'}
+
+_account_table = Account.__table__
+_debit = update(_account_table)\
+    .where(_account_table.c.id == bindparam('b_account_id'))\
+    .where(_account_table.c.balance >= bindparam('b_amount'))\
+    .values(balance=_account_table.c.balance - bindparam('b_amount'))
+_credit = update(_account_table)\
+    .where(_account_table.c.id == bindparam('b_account_id'))\
+    .values(balance=_account_table.c.balance + bindparam('b_amount'))
+
+_transfer_table = TransferRequest.__table__
+_set_transfer_status = update(_transfer_table)\
+    .where(_transfer_table.c.id == bindparam('b_transfer_id'))\
+    .values(status=bindparam('b_status'), risk_score=bindparam('b_risk_score'),
+            updated_at=bindparam('b_updated_at'))
+
+_offset_table = LedgerOffset.__table__
+_advance_offset = update(_offset_table)\
+    .where(_offset_table.c.partition == bindparam('b_partition'))\
+    .where(_offset_table.c.committed_offset == bindparam('b_expected'))\
+    .values(committed_offset=bindparam('b_offset'), updated_at=bindparam('b_updated_at'))
+
+
+class StaleOffsetError(RuntimeError):
+    """Another consumer committed this partition since it was loaded."""
+
+
+def is_retryable(error):
+    """Whether a failed transaction lost a lock conflict and can simply be replayed."""
+    if not isinstance(error, DBAPIError):
+        return False
+    orig = error.orig
+    sqlstate = getattr(orig, 'sqlstate', None) or getattr(orig, 'pgcode', None)
+    return sqlstate in _RETRYABLE_SQLSTATES or 'database is locked' in str(orig)
+
+
+def transfer_funds(from_account_id, to_account_id, amount):
+    """
+    Moves amount (minor units) between two accounts in the current DB transaction.
+
+    The debit is a single conditional UPDATE, so the balance check and the
+    write are atomic even with several writers; the credit only runs when
+    the debit matched.
+
+    Returns:
+        bool: False, with nothing written, if the sender's balance is too low.
+    """
+    debited = db.session.execute(_debit, {'b_account_id': from_account_id, 'b_amount': amount})
+    if debited.rowcount != 1:
+        return False
+    db.session.execute(_credit, {'b_account_id': to_account_id, 'b_amount': amount})
+    return True
+
+
+class LedgerPartition:
+    """
+    Single writer for one partition of the transfer_requests topic.
+
+    Transfers are applied in offset order with transfer_funds() inside one
+    open DB transaction; the resulting Transaction rows, transfer outcomes
+    and the partition's offset are group-committed with it, which makes
+    replays idempotent. Every account of a batch is locked up front in id
+    order, so two partitions touching the same accounts wait for each other
+    instead of deadlocking.
+    """
+
+    def __init__(self, partition, committed_offset=-1, fraud_threshold=0.5):
+        self.partition = partition
+        self.committed_offset = committed_offset
+        self.fraud_threshold = fraud_threshold
+        self.owners = {}  # account id -> user_id
+        self._last_offset = committed_offset
+        self._rows = []
+        self._outcomes = []
+
+    def _lock_accounts(self, account_ids):
+        # FOR UPDATE in id order is a global lock order; SQLite ignores it and locks on the first write
+        rows = db.session.query(Account.id, Account.user_id)\
+            .filter(Account.id.in_(sorted(account_ids)))\
+            .order_by(Account.id)\
+            .with_for_update()
+        self.owners.update(rows)
+
+    def _apply_one(self, data, fraud_score):
+        from_id, to_id = data['from_account'], data['to_account']
+        amount = int(data['amount'])  # minor units
+
+        if fraud_score > self.fraud_threshold:
+            return REJECTED_FRAUD
+        if from_id not in self.owners or to_id not in self.owners:
+            return UNKNOWN_ACCOUNT
+        if self.owners[from_id] != data['user_id']:
+            return UNAUTHORIZED
+        if not transfer_funds(from_id, to_id, amount):
+            return INSUFFICIENT_FUNDS
+
+        self._rows.append({
+            'from_account_id': from_id,
+            'to_account_id': to_id,
+            'amount': amount,
+            'transaction_type': 'transfer',
+            'risk_score': float(fraud_score),
+            'timestamp': datetime.utcnow(),
+        })
+        return COMPLETED
+
+    def apply(self, records):
+        """
+        Applies transfers in offset order, skipping offsets already committed.
+
+        Args:
+            records (list): (offset, transfer dict, fraud score) tuples.
+
+        Returns:
+            list: (offset, transfer dict, outcome) for every record applied.
+        """
+        records = [record for record in records if record[0] > self._last_offset]
+        account_ids = {data['from_account'] for _, data, _ in records} | \
+                      {data['to_account'] for _, data, _ in records}
+
+        outcomes = []
+        try:
+            if account_ids:
+                self._lock_accounts(account_ids)
+            for offset, data, fraud_score in records:
+                outcome = self._apply_one(data, fraud_score)
+                outcomes.append((offset, data, outcome))
+                if 'transfer_id' in data:
+                    self._outcomes.append({
+                        'b_transfer_id': data['transfer_id'],
+                        'b_status': outcome,
+                        'b_risk_score': float(fraud_score),
+                        'b_updated_at': datetime.utcnow(),
+                    })
+                self._last_offset = offset
+        except Exception:
+            db.session.rollback()
+            self.reset()
+            raise
+        return outcomes
+
+    def flush(self):
+        """
+        Group-commits the applied balance updates with the pending rows and
+        their rollups, the transfer outcomes and the offset.
+
+        On failure the transaction is rolled back and the in-memory state is
+        dropped; the caller must replay from committed_offset + 1. Raises
+        StaleOffsetError if another consumer advanced the partition first.
+
+        Returns:
+            int: Number of transfers committed.
+        """
+        if self._last_offset == self.committed_offset:
+            return 0
+        committed = len(self._rows)
+        try:
+            if self._rows:
+                db.session.execute(insert(Transaction), self._rows)
+                record_transactions(self._rows)
+            if self._outcomes:
+                db.session.execute(_set_transfer_status, self._outcomes)
+            self._commit_offset()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.reset()
+            raise
+        self.committed_offset = self._last_offset
+        self._rows = []
+        self._outcomes = []
+        return committed
+
+    def _commit_offset(self):
+        # Compare-and-set, so a consumer that lost the partition cannot commit over its new owner
+        if self.committed_offset < 0 and db.session.get(LedgerOffset, self.partition) is None:
+            db.session.add(LedgerOffset(partition=self.partition, committed_offset=self._last_offset))
+            db.session.flush()
+            return
+        advanced = db.session.execute(_advance_offset, {
+            'b_partition': self.partition,
+            'b_expected': self.committed_offset,
+            'b_offset': self._last_offset,
+            'b_updated_at': datetime.utcnow(),
+        })
+        if advanced.rowcount != 1:
+            raise StaleOffsetError(f"Partition {self.partition} was committed past offset {self.committed_offset}")
+
+    def reset(self):
+        self._rows = []
+        self._outcomes = []
+        self._last_offset = self.committed_offset
+
+
+class LedgerEngine:
+    """Routes consumed transfers to the LedgerPartition owning their partition."""
+
+    def __init__(self, fraud_threshold=0.5):
+        self.fraud_threshold = fraud_threshold
+        self.partitions = {}
+
+    def partition(self, partition_id):
+        ledger = self.partitions.get(partition_id)
+        if ledger is None:
+            committed_offset = db.session.query(LedgerOffset.committed_offset)\
+                .filter_by(partition=partition_id).scalar()
+            ledger = self.partitions[partition_id] = LedgerPartition(
+                partition_id,
+                -1 if committed_offset is None else committed_offset,
+                self.fraud_threshold,
+            )
+        return ledger
+
+    def reset(self):
+        """Forgets every partition, so committed offsets are reloaded from the database."""
+        db.session.rollback()
+        self.partitions = {}
+
+    def is_committed(self, partition_id, offset):
+        """Whether the ledger already committed this offset, i.e. the record is a replay."""
+        return offset <= self.partition(partition_id).committed_offset
+
+    def _commit_group(self, ledger, records):
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                applied = ledger.apply(records)
+                ledger.flush()
+                return applied
+            except DBAPIError as error:
+                # apply/flush rolled back and reset the partition, so the group replays from scratch
+                if attempt == MAX_RETRIES or not is_retryable(error):
+                    raise
+                time.sleep(RETRY_BACKOFF_MS * 2 ** attempt / 1000)
+
+    def process(self, records_by_partition, on_commit=None, group_size=COMMIT_GROUP_SIZE):
+        """
+        Applies and commits the batch of each partition, group_size transfers
+        per DB transaction. Groups that lose a deadlock or serialization
+        conflict are retried.
+
+        Args:
+            records_by_partition (dict): Partition id to (offset, transfer, fraud score) tuples.
+            on_commit (callable): Called with (partition id, outcomes) once
+                outcomes of the partition are committed.
+            group_size (int): Transfers per DB transaction.
+
+        Returns:
+            list: (offset, transfer dict, outcome) for every record applied.
+        """
+        outcomes = []
+        for partition_id, records in records_by_partition.items():
+            ledger = self.partition(partition_id)
+            for start in range(0, len(records), group_size):
+                applied = self._commit_group(ledger, records[start:start + group_size])
+                if on_commit is not None:
+                    on_commit(partition_id, applied)
+                outcomes.extend(applied)
+        return outcomes
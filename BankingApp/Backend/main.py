@@ -1,15 +1,19 @@
+import os
+import threading
 from flask import Flask
 from models import db
+from database import init_db
+from migrate import migrate_database
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from routes import api
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///banking.db'
 app.config['JWT_SECRET_KEY'] = 'j2xvP6rAfwWpjV1UAugs3idnS6Z9Q6Z2'  
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db.init_app(app)
+# DATABASE_URL selects the SQLite (WAL) or PostgreSQL profile, see database.py
+init_db(app)
 CORS(app, resources={r"/api/*": {"origins": ["*"], "methods": ["GET", "POST", "PUT", "DELETE"], "allow_headers": ["Content-Type", "Authorization"], "supports_credentials": True}})
 jwt = JWTManager(app)
 
@@ -18,10 +22,24 @@ app.register_blueprint(api, url_prefix='/api')
 def home():
     return "Banking App API"
 
-with app.app_context():
-    db.create_all()
+# The schema is migrated once per deploy by migrate.py, never by each worker at import
+@app.cli.command('migrate')
+def migrate_command():
+    """Brings the database schema up to date."""
+    migrated = migrate_database()
+    if migrated:
+        print(f"✅ Converted to minor units: {', '.join(migrated)}")
 
+# Without a broker the consumer runs as a thread of the API process
+if os.getenv('TRANSFER_TRANSPORT') == 'memory':
+    from model_processing import check_artifacts
+    from transfer_consumer import run_consumer
+    # Refuse to start rather than accept transfers that would stay pending
+    check_artifacts()
+    threading.Thread(target=run_consumer, args=(app,), daemon=True).start()
+
+# Development server only; run wsgi.py under gunicorn for multiple workers
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        migrate_database()
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Brings the database schema up to date, once per deploy and before any worker
+starts serving:
+
+    python migrate.py
+
+gunicorn.conf.py runs it in the master process (on_starting), and main.py
+before the development server; API workers only connect. Every step is
+idempotent, so running it against an up-to-date database is a no-op.
+"""
+from flask import Flask
+from sqlalchemy import inspect, text
+from models import db, Transaction, TransactionRollup
+from database import init_db
+from migrate_money import migrate as migrate_money
+from analytics import rebuild_rollups
+
+
+def create_app():
+    """A bare app bound to the configured database, without routes or the consumer thread."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app)
+    return app
+
+
+def _add_missing_columns(engine):
+    # create_all skips columns added to tables that already exist
+    if 'updated_at' not in {column['name'] for column in inspect(engine).get_columns('transaction')}:
+        with engine.begin() as connection:
+            connection.execute(text('ALTER TABLE "transaction" ADD COLUMN updated_at TIMESTAMP'))
+
+
+def _build_missing_rollups():
+    # Databases created before the rollups have transactions but no rollup rows
+    if db.session.query(TransactionRollup.account_id).first() is None \
+            and db.session.query(Transaction.id).first() is not None:
+        rebuild_rollups()
+        print(f"✅ Built {TransactionRollup.query.count()} transaction rollups")
+
+
+def migrate_database():
+    """
+    Creates missing tables, columns and indexes, converts money columns
+    to minor units and builds the transaction rollups of existing
+    transactions, inside the current app context.
+
+    Returns:
+        list: "table.column" names converted to minor units.
+    """
+    db.create_all()
+    # Databases created before money moved to integer minor units still hold FLOAT major units
+    migrated = migrate_money(db.engine)
+    _add_missing_columns(db.engine)
+    # ...and indexes added to tables that already exist
+    for index in Transaction.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
+    _build_missing_rollups()
+    return migrated
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        migrated = migrate_database()
+        # Nothing opened here may be inherited by forked workers
+        db.engine.dispose()
+    if migrated:
+        print(f"✅ Converted to minor units: {', '.join(migrated)}")
+    print("✅ Database schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
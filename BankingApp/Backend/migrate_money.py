@@ -0,0 +1,88 @@
+"""
+Converts money columns from floating-point major units to integer minor units.
+
+Each column is rebuilt as BIGINT holding ROUND(value * MINOR_UNITS). Columns
+that are already integers are skipped, so the script is safe to re-run.
+SQLite commits each DDL statement on its own, so a run that fails halfway
+leaves a <column>_minor column behind; the next run resumes from it.
+
+    python migrate_money.py
+"""
+from sqlalchemy import inspect, text, Integer
+from models import db
+from money import MINOR_UNITS
+
+# (table, column, NOT NULL)
+MONEY_COLUMNS = [
+    ('account', 'balance', True),
+    ('transaction', 'amount', True),
+    ('transfer_request', 'amount', True),
+    ('transaction_rollup', 'total_amount', True),
+    ('transaction_rollup', 'max_amount', True),
+]
+
+
+ADD, UPDATE, DROP, RENAME = 'add', 'update', 'drop', 'rename'
+ALL_STEPS = (ADD, UPDATE, DROP, RENAME)
+
+
+def pending_steps(inspector, table, column):
+    """
+    Steps of migrate_column() still to run, judged from the columns present.
+
+    Returns:
+        tuple: Nothing for an integer column, a suffix of ALL_STEPS otherwise.
+    """
+    types = {info['name']: info['type'] for info in inspector.get_columns(table)}
+    if f'{column}_minor' in types:
+        # An earlier run stopped after ADD (the UPDATE is repeatable) or after DROP
+        return (UPDATE, DROP, RENAME) if column in types else (RENAME,)
+    if column not in types:
+        raise LookupError(f"Column {table}.{column} not found")
+    return () if isinstance(types[column], Integer) else ALL_STEPS
+
+
+def migrate_column(connection, table, column, not_null, steps=ALL_STEPS):
+    quote = connection.dialect.identifier_preparer.quote
+    table_name, old, new = quote(table), quote(column), quote(f'{column}_minor')
+    constraint = ' NOT NULL DEFAULT 0' if not_null else ''
+    if ADD in steps:
+        connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {new} BIGINT{constraint}'))
+    if UPDATE in steps:
+        connection.execute(text(
+            f'UPDATE {table_name} SET {new} = CAST(ROUND(COALESCE({old}, 0) * {MINOR_UNITS}) AS BIGINT)'
+        ))
+    if DROP in steps:
+        connection.execute(text(f'ALTER TABLE {table_name} DROP COLUMN {old}'))
+    if RENAME in steps:
+        connection.execute(text(f'ALTER TABLE {table_name} RENAME COLUMN {new} TO {old}'))
+
+
+def migrate(engine):
+    """
+    Returns:
+        list: "table.column" names that were converted.
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    pending = [
+        (table, column, not_null, pending_steps(inspector, table, column))
+        for table, column, not_null in MONEY_COLUMNS if table in tables
+    ]
+    pending = [migration for migration in pending if migration[3]]
+    # One transaction; with transactional DDL (PostgreSQL) a failure leaves every column in its old unit
+    with engine.begin() as connection:
+        for table, column, not_null, steps in pending:
+            migrate_column(connection, table, column, not_null, steps)
+    return [f"{table}.{column}" for table, column, _, _ in pending]
+
+
+if __name__ == "__main__":
+    from main import app
+
+    with app.app_context():
+        migrated = migrate(db.engine)
+    if migrated:
+        print(f"✅ Converted to minor units: {', '.join(migrated)}")
+    else:
+        print("✅ Money columns already use minor units")
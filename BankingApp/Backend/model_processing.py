@@ -1,54 +1,101 @@
-import pandas as pd
+import os
 import numpy as np
-import tensorflow as tf
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+from feature_pipeline import FeaturePipeline, PIPELINE_PATH
+from inference import load_fraud_model
+from model_registry import ModelRegistry, load_arrays
 
-fraud_model = tf.keras.models.load_model("credit_card_fraud_detect_NN_model.keras")
+# Memory-map weights so forked gunicorn/consumer workers share one copy
+USE_MMAP = os.getenv('FRAUD_MODEL_MMAP', '1') == '1'
 
-def preprocess_transaction(transaction_data, transaction_count):
+class MissingArtifactError(RuntimeError):
+    """A model artifact is not on disk; retrying cannot help until it is fitted."""
+
+def check_artifacts():
+    """
+    Fails fast, before any transfer is consumed, when the feature pipeline
+    has not been fitted.
+
+    Raises:
+        MissingArtifactError: With the command that fits the artifact.
+    """
+    # Fitted once offline by preprocessing_py.py
+    if not os.path.exists(PIPELINE_PATH):
+        raise MissingArtifactError(
+            f"Feature pipeline artifact {PIPELINE_PATH} is missing, fit it with "
+            f"`python preprocessing_py.py <transactions.csv>` in {os.getcwd()}"
+        )
+
+def _load_feature_pipeline():
+    check_artifacts()
+    return FeaturePipeline.from_arrays(load_arrays(PIPELINE_PATH, mmap=USE_MMAP))
+
+def _warm_up_fraud_model(model):
+    model.predict(np.zeros((1, model.n_features), dtype=np.float32))
+
+# Models are loaded on first use, not when this module is imported
+models = ModelRegistry()
+models.register('fraud_model', lambda: load_fraud_model(mmap=USE_MMAP), _warm_up_fraud_model)
+models.register('feature_pipeline', _load_feature_pipeline, lambda pipeline: pipeline.transform_one({}, 0))
+
+def warm_up_models():
+    """
+    Loads and exercises every registered model, printing how long each took.
+
+    Returns:
+        dict: Model name to {"load_ms", "warmup_ms"}.
+    """
+    report = models.warm_up()
+    for name, timings in report.items():
+        print(f"🔥 {name} loaded in {timings['load_ms']} ms, first inference {timings['warmup_ms']} ms")
+    return report
+
+def build_features(transaction_data, transaction_count):
     """
-    Preprocesses a transaction and predicts fraud probability using the Keras model.
+    Builds the model input for a transaction with the pre-fitted pipeline.
 
     Args:
         transaction_data (dict): A dictionary containing transaction details.
+        transaction_count (int): Transactions by the same user in the last 24h.
 
     Returns:
-        float: Fraud probability score (0 to 1).
+        np.ndarray: Array of shape (1, 29) with V1..V28 and Transaction_Frequency.
     """
+    return models.get('feature_pipeline').transform_one(transaction_data, transaction_count)
 
-    # Convert transaction data to DataFrame
-    df = pd.DataFrame([transaction_data])
+def build_batch_features(transactions, transaction_counts):
+    """Builds model inputs of shape (n, 29) for a batch of transactions."""
+    return models.get('feature_pipeline').transform(transactions, transaction_counts)
 
-    # Convert 'Time' to datetime and calculate 'Transaction_Count_24H'
-    df['Transaction_Timestamp'] = pd.to_datetime(df['Time'], unit='s')
-    df['Transaction_Count_24H'] = transaction_count
-    df = df.drop(columns=['Time'])  # Drop raw time column
-
-    # One-Hot Encode categorical features
-    categorical_cols = ["Merchant_Category", "Transaction_Location", "Card_Type",
-                        "Device_Type", "Authentication_Method", "Payment_Gateway",
-                        "User_Age_Group", "Transaction_Channel"]
+def score_frame(frame, transaction_counts):
+    """
+    Scores a pandas DataFrame of raw transactions with a single model
+    forward pass, used by bulk backfills.
 
-    df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
+    Returns:
+        np.ndarray: Fraud probability per row.
+    """
+    if len(frame) == 0:
+        return np.empty(0, dtype=np.float32)
+    return predict_fraud(models.get('feature_pipeline').transform_frame(frame, transaction_counts))
 
-    # StandardScaler for numerical features (excluding Transaction Count)
-    scaler = StandardScaler()
-    numerical_features = df.drop(columns=['Transaction_Count_24H'])
-    features_scaled = scaler.fit_transform(numerical_features)  # Fit & Transform
+def predict_fraud(features):
+    """Runs one forward pass and returns the fraud probability per row."""
+    return models.get('fraud_model').predict(features).reshape(-1)
 
-    # Apply PCA to reduce dimensions to 28
-    pca = PCA(n_components=28)
-    pca_features = pca.fit_transform(features_scaled)  # Fit & Transform
+def preprocess_transaction(transaction_data, transaction_count):
+    """
+    Preprocesses a transaction and predicts fraud probability using the fraud model.
 
-    # Convert PCA output to DataFrame
-    pca_columns = [f"V{i+1}" for i in range(28)]
-    df_pca = pd.DataFrame(pca_features, columns=pca_columns)
+    Args:
+        transaction_data (dict): A dictionary containing transaction details.
+        transaction_count (int): Transactions by the same user in the last 24h.
 
-    # Add Transaction Frequency back
-    df_pca["Transaction_Frequency"] = df["Transaction_Count_24H"].values
+    Returns:
+        float: Fraud probability score (0 to 1).
+    """
+    features = build_features(transaction_data, transaction_count)
 
-    # Predict fraud probability using Keras model
-    fraud_probability = fraud_model.predict(df_pca)[0][0]
+    # Predict fraud probability using the fraud model
+    fraud_probability = models.get('fraud_model').predict(features)[0][0]
 
-    return fraud_probability
+    return float(fraud_probability)
@@ -0,0 +1,106 @@
+import os
+import shutil
+import threading
+import time
+import numpy as np
+
+
+def load_arrays(path, mmap=False):
+    """
+    Loads the arrays of a .npz artifact.
+
+    With mmap=True the artifact is unpacked once into a sibling directory of
+    .npy files which are memory-mapped read-only, so every forked worker
+    shares the same physical pages through the OS page cache.
+
+    Returns:
+        dict: Array name to np.ndarray (or np.memmap).
+    """
+    if not mmap:
+        with np.load(path, allow_pickle=False) as artifact:
+            return {name: artifact[name] for name in artifact.files}
+
+    unpacked_dir = os.path.splitext(path)[0] + "_npy"
+    if not os.path.isdir(unpacked_dir) or os.path.getmtime(unpacked_dir) < os.path.getmtime(path):
+        _unpack(path, unpacked_dir)
+    return {
+        os.path.splitext(name)[0]: np.load(os.path.join(unpacked_dir, name), mmap_mode="r")
+        for name in os.listdir(unpacked_dir) if name.endswith(".npy")
+    }
+
+
+def _unpack(path, unpacked_dir):
+    # Write into a temporary directory and rename, so concurrent workers
+    # never map a half-written file
+    tmp_dir = f"{unpacked_dir}.tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    with np.load(path, allow_pickle=False) as artifact:
+        for name in artifact.files:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), artifact[name])
+    try:
+        if os.path.isdir(unpacked_dir):
+            os.rename(unpacked_dir, f"{tmp_dir}.old")
+        os.rename(tmp_dir, unpacked_dir)
+    except OSError:
+        # Another worker won the race, its copy is identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(f"{tmp_dir}.old", ignore_errors=True)
+
+
+class ModelRegistry:
+    """
+    Loads models on first use instead of at import time.
+
+    Loaders are registered by name and run at most once per process, guarded
+    by a lock so concurrent requests share a single instance.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._warmers = {}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, warmer=None):
+        """
+        Args:
+            name (str): Registry key.
+            loader (callable): Builds the model, called once on first use.
+            warmer (callable): Optional, runs a dummy inference on the loaded model.
+        """
+        self._loaders[name] = loader
+        if warmer is not None:
+            self._warmers[name] = warmer
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._models[name] = self._loaders[name]()
+        return model
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warm_up(self, names=None):
+        """
+        Loads (and exercises) models up front so the first request does not
+        pay the cold start.
+
+        Returns:
+            dict: Model name to {"load_ms", "warmup_ms"}.
+        """
+        report = {}
+        for name in names or list(self._loaders):
+            start = time.perf_counter()
+            model = self.get(name)
+            loaded = time.perf_counter()
+            if name in self._warmers:
+                self._warmers[name](model)
+            report[name] = {
+                "load_ms": round((loaded - start) * 1000, 3),
+                "warmup_ms": round((time.perf_counter() - loaded) * 1000, 3),
+            }
+        return report
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from money import Money, to_major
 
 db = SQLAlchemy()
 
@@ -22,7 +23,7 @@ class User(db.Model):
 class Account(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     account_number = db.Column(db.String(20), unique=True, nullable=False)
-    balance = db.Column(db.Float, default=0.0)
+    balance = db.Column(Money, nullable=False, default=0)  # minor units
     account_type = db.Column(db.Enum('Savings', 'Current'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -42,15 +43,22 @@ class Account(db.Model):
         return {
             'id': self.id,
             'account_number': "X"*8+self.account_number[:4],
-            'balance': self.balance,
+            'balance': to_major(self.balance),
             'account_type': self.account_type,
             'user_id': self.user_id,
             'created_at': self.created_at.isoformat()
         }
 
 class Transaction(db.Model):
+    # keyset pagination on (timestamp, id) per account and for admin listings
+    __table_args__ = (
+        db.Index('ix_transaction_from_account_timestamp', 'from_account_id', 'timestamp', 'id'),
+        db.Index('ix_transaction_to_account_timestamp', 'to_account_id', 'timestamp', 'id'),
+        db.Index('ix_transaction_timestamp', 'timestamp', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)  # minor units
     transaction_type = db.Column(db.String(20), nullable=False)
     description = db.Column(db.String(200))
     risk_score = db.Column(db.Float, nullable=True)
@@ -60,6 +68,8 @@ class Transaction(db.Model):
     flag_reason = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # part of the ETag of transaction pages
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # relationships with explicit foreign keys
     from_account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
@@ -89,7 +99,7 @@ class Transaction(db.Model):
             'id': self.id,
             'from_account': self.from_account_id,
             'to_account': self.to_account_id,
-            'amount': self.amount,
+            'amount': to_major(self.amount),
             'type': self.transaction_type,
             'is_flagged': self.is_flagged,
             'flag_reason': self.flag_reason,
@@ -106,10 +116,59 @@ class TransactionHistory:
         
         return {
             'transactions': recent_transactions,
-            'get_average_transaction_amount': lambda: sum(t.amount for t in recent_transactions) / len(recent_transactions) if recent_transactions else 0,
+            'get_average_transaction_amount': lambda: to_major(sum(t.amount for t in recent_transactions)) / len(recent_transactions) if recent_transactions else 0,
             'get_transaction_frequency': lambda: len(recent_transactions)
         }
 
+class TransferRequest(db.Model):
+    # outcome of an asynchronous /api/transfer submission, written by the consumer
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    from_account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
+    to_account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
+    amount = db.Column(Money, nullable=False)  # minor units
+    risk_score = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'from_account': self.from_account_id,
+            'to_account': self.to_account_id,
+            'amount': to_major(self.amount),
+            'risk_score': self.risk_score,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+class LedgerOffset(db.Model):
+    # last Kafka offset applied per partition, committed with the ledger batch
+    partition = db.Column(db.Integer, primary_key=True)
+    committed_offset = db.Column(db.BigInteger, nullable=False, default=-1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class BackfillCheckpoint(db.Model):
+    # rows of a backfill source already imported, committed with each chunk
+    source = db.Column(db.String(255), primary_key=True)
+    rows_done = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class TransactionRollup(db.Model):
+    # per sending account and hour, maintained by analytics.record_transactions
+    __table_args__ = (
+        db.Index('ix_transaction_rollup_hour', 'hour', 'account_id'),
+    )
+
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(Money, nullable=False, default=0)
+    max_amount = db.Column(Money, nullable=False, default=0)
+    flagged_count = db.Column(db.Integer, nullable=False, default=0)
+
 class Card(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     card_number = db.Column(db.String(16), unique=True, nullable=False)
@@ -0,0 +1,82 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import numpy as np
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+# Money is stored and computed as integer minor units (paise/cents)
+MINOR_UNITS = 100
+_QUANTUM = Decimal(1) / MINOR_UNITS
+# Largest amount a BIGINT column holds
+MAX_MINOR = 2 ** 63 - 1
+
+
+def to_minor(value):
+    """
+    Converts a major-unit amount from a request ("12.34", 12.34, 12) to minor units.
+
+    Floats are parsed through their shortest repr, so 0.1 becomes 10, not 9.
+
+    Raises:
+        ValueError: If the value is not a finite number or does not fit a BIGINT.
+    """
+    if isinstance(value, bool) or value is None:
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        amount = Decimal(str(value))
+        if not amount.is_finite():
+            raise ValueError(f"Invalid amount: {value!r}")
+        # Raises InvalidOperation beyond the context precision, e.g. for "1e30"
+        minor = int(amount.quantize(_QUANTUM, rounding=ROUND_HALF_UP) * MINOR_UNITS)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    if abs(minor) > MAX_MINOR:
+        raise ValueError(f"Amount out of range: {value!r}")
+    return minor
+
+
+def to_minor_array(values):
+    """
+    Vectorized to_minor() for bulk imports of amounts already at minor-unit
+    precision (e.g. 12.34), where value * MINOR_UNITS is within rounding
+    error of an integer.
+
+    Raises:
+        ValueError: If any value is not a finite number or does not fit a BIGINT.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    minor = np.rint(values * MINOR_UNITS)
+    # Casting NaN, inf or anything from 2 ** 63 up to int64 silently yields INT64_MIN
+    invalid = ~np.isfinite(minor) | (np.abs(minor) >= float(MAX_MINOR + 1))
+    if invalid.any():
+        value = values[invalid][0]
+        reason = "Invalid amount" if not np.isfinite(value) else "Amount out of range"
+        raise ValueError(f"{reason}: {value!r}")
+    return minor.astype(np.int64)
+
+
+def to_major(minor):
+    """Minor units as a float in major units, for JSON responses and model features."""
+    return minor / MINOR_UNITS
+
+
+class Money(TypeDecorator):
+    """
+    Integer minor units in a BIGINT column.
+
+    Floats are rejected on the way in so major-unit values cannot be written
+    by mistake; use to_minor() at the edges.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, float):
+            raise TypeError(f"Money columns take integer minor units, got float {value!r}")
+        return int(value)
+
+    def process_result_value(self, value, dialect):
+        # Rows written before the migration may still hold REAL values in SQLite
+        return None if value is None else int(value)
@@ -0,0 +1,122 @@
+import numpy as np
+
+NUMPY_MODEL_PATH = "credit_card_fraud_detect_NN_model.npz"
+
+
+def fold_batch_norm(kernel, bias, gamma, beta, moving_mean, moving_variance, epsilon):
+    """Folds an inference-mode BatchNormalization into the preceding Dense weights."""
+    scale = gamma / np.sqrt(moving_variance + epsilon)
+    return kernel * scale, (bias - moving_mean) * scale + beta
+
+
+def export_numpy_weights(keras_model, path=NUMPY_MODEL_PATH):
+    """
+    Exports the Dense/BatchNorm/LeakyReLU fraud network to a .npz file.
+
+    BatchNormalization layers are folded into the Dense layer before them and
+    Dropout is dropped, so the result is a plain stack of affine layers. A
+    BatchNormalization or LeakyReLU that follows an activation becomes an
+    extra affine layer instead, since it cannot be folded across it.
+
+    Args:
+        keras_model (tf.keras.Model): The trained Sequential model.
+        path (str): Where to write the weights.
+
+    Returns:
+        str: The path written.
+    """
+    layers = []  # [kernel, bias, activation, negative_slope]
+    for layer in keras_model.layers:
+        kind = type(layer).__name__
+        config = layer.get_config()
+        if kind == "Dense":
+            kernel, bias = layer.get_weights()
+            layers.append([kernel, bias, config["activation"], 0.0])
+        elif kind == "BatchNormalization":
+            weights = layer.get_weights()
+            gamma = weights.pop(0) if config["scale"] else 1.0
+            beta = weights.pop(0) if config["center"] else 0.0
+            moving_mean, moving_variance = weights
+            if layers[-1][2] != "linear":
+                # After a non-linearity the normalization is its own affine layer
+                layers.append([np.eye(len(moving_mean)), np.zeros(len(moving_mean)), "linear", 0.0])
+            kernel, bias = layers[-1][:2]
+            layers[-1][:2] = fold_batch_norm(kernel, bias, gamma, beta,
+                                             moving_mean, moving_variance, config["epsilon"])
+        elif kind == "LeakyReLU":
+            if layers[-1][2] != "linear":
+                width = layers[-1][1].shape[0]
+                layers.append([np.eye(width), np.zeros(width), "linear", 0.0])
+            layers[-1][2] = "leaky_relu"
+            layers[-1][3] = config.get("negative_slope", config.get("alpha"))
+        elif kind in ("Dropout", "InputLayer"):
+            continue
+        else:
+            raise ValueError(f"Unsupported layer type for NumPy export: {kind}")
+
+    arrays = {}
+    for i, (kernel, bias, _, _) in enumerate(layers):
+        arrays[f"kernel_{i}"] = np.asarray(kernel, dtype=np.float32)
+        arrays[f"bias_{i}"] = np.asarray(bias, dtype=np.float32)
+    np.savez(
+        path,
+        activations=np.array([layer[2] for layer in layers], dtype=str),
+        negative_slopes=np.array([layer[3] for layer in layers], dtype=np.float32),
+        **arrays,
+    )
+    return path
+
+
+class NumpyFraudModel:
+    """
+    Pure-NumPy evaluator for the exported fraud MLP.
+
+    Produces the same probabilities as the Keras model in inference mode,
+    without importing TensorFlow: a batch is scored with one GEMM per layer.
+    """
+
+    def __init__(self, kernels, biases, activations, negative_slopes):
+        self.kernels = list(kernels)
+        self.biases = list(biases)
+        self.activations = list(activations)
+        self.negative_slopes = [float(slope) for slope in negative_slopes]
+        self.n_features = self.kernels[0].shape[0]
+
+    @classmethod
+    def from_arrays(cls, weights):
+        activations = weights["activations"].tolist()
+        return cls(
+            [weights[f"kernel_{i}"] for i in range(len(activations))],
+            [weights[f"bias_{i}"] for i in range(len(activations))],
+            activations,
+            weights["negative_slopes"],
+        )
+
+    @classmethod
+    def load(cls, path=NUMPY_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as weights:
+            return cls.from_arrays(weights)
+
+    def predict(self, features):
+        """
+        Args:
+            features (np.ndarray): Model inputs of shape (n, n_features).
+
+        Returns:
+            np.ndarray: Fraud probabilities of shape (n, 1), like Model.predict.
+        """
+        outputs = np.asarray(features, dtype=np.float32)
+        for kernel, bias, activation, slope in zip(self.kernels, self.biases,
+                                                   self.activations, self.negative_slopes):
+            outputs = outputs @ kernel
+            outputs += bias
+            if activation == "relu":
+                np.maximum(outputs, 0, out=outputs)
+            elif activation == "leaky_relu":
+                outputs = np.where(outputs > 0, outputs, outputs * slope)
+            elif activation == "sigmoid":
+                # 1 / (1 + exp(-x)) without overflowing for large negative logits
+                outputs = np.exp(-np.logaddexp(0, -outputs))
+            elif activation != "linear":
+                raise ValueError(f"Unsupported activation: {activation}")
+        return outputs
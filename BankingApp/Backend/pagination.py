@@ -0,0 +1,134 @@
+import base64
+import binascii
+import hashlib
+import heapq
+from datetime import datetime
+from flask import Response, jsonify, request, stream_with_context, url_for
+from sqlalchemy import select, tuple_, union_all
+from serialization import dumps, json_response, not_modified
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+
+def encode_cursor(timestamp, row_id):
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def _branches(query):
+    """
+    A list query is either one query or several disjoint branch queries
+    whose union is the result, e.g. the sent and the received transactions
+    of an account. One OR filter instead would make the database merge two
+    indexes and sort the account's whole history for every page.
+    """
+    return list(query) if isinstance(query, (list, tuple)) else [query]
+
+
+def keyset_page(query, timestamp_col, id_col, limit, cursor=None):
+    """
+    Returns one page of rows, newest first, using keyset pagination on
+    (timestamp, id) so deep pages cost the same as the first one.
+
+    Each branch of the query applies the cursor and the limit on its own
+    (timestamp, id) index; the UNION ALL of the branches is then cut to the
+    page, so at most limit + 1 rows per branch are read.
+
+    Returns:
+        tuple: (rows, next cursor or None)
+    """
+    branches = _branches(query)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        # A row-value comparison seeks the index; the equivalent OR only filters the scan
+        after_cursor = tuple_(timestamp_col, id_col) < tuple_(timestamp, row_id)
+        branches = [branch.filter(after_cursor) for branch in branches]
+    branches = [branch.order_by(timestamp_col.desc(), id_col.desc()).limit(limit + 1) for branch in branches]
+    if len(branches) == 1:
+        rows = branches[0].all()
+    else:
+        union = union_all(*(select(branch.subquery()) for branch in branches)).subquery()
+        rows = branches[0].session.query(union)\
+            .order_by(union.c[timestamp_col.key].desc(), union.c[id_col.key].desc())\
+            .limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(getattr(last, timestamp_col.key), getattr(last, id_col.key))
+
+
+def page_etag(keys, *parts):
+    """
+    ETag of a page from the (id, updated_at) of its rows. A row's content
+    only changes together with its updated_at, and a new or removed row
+    changes the keys, so the page body never has to be serialized to tell
+    whether it changed.
+    """
+    raw = '|'.join(str(part) for part in (*keys, *parts))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def stream_ndjson(query, timestamp_col, id_col, serialize):
+    """
+    Streams every row as one JSON document per line, fetching in fixed-size
+    batches. The branches are read in index order and merged here, so the
+    full result is never sorted by the database.
+    """
+    def newest_first(row):
+        timestamp = getattr(row, timestamp_col.key)
+        # Rows without a timestamp come last, as in ORDER BY ... DESC on SQLite
+        return timestamp is not None, timestamp or datetime.min, getattr(row, id_col.key)
+
+    def generate():
+        streams = [branch.order_by(timestamp_col.desc(), id_col.desc()).yield_per(STREAM_BATCH_SIZE)
+                   for branch in _branches(query)]
+        for row in heapq.merge(*streams, key=newest_first, reverse=True):
+            yield dumps(serialize(row)) + b"\n"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def paginated_response(query, timestamp_col, id_col, serialize, updated_col=None):
+    """
+    Builds a list response from the request's limit/cursor/format arguments.
+    query is one query or a list of disjoint branch queries, see _branches().
+
+    The body stays a JSON list; the cursor of the next page is returned in the
+    X-Next-Cursor and Link headers. Pages carry an ETag, so an unchanged page
+    is answered with 304. With updated_col the ETag is page_etag() of the
+    fetched rows, and a matching If-None-Match is answered without
+    serializing the page. format=ndjson streams the full result.
+    """
+    if request.args.get('format') == 'ndjson':
+        return stream_ndjson(query, timestamp_col, id_col, serialize)
+
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    if updated_col is not None:
+        query = [branch.add_columns(updated_col) for branch in _branches(query)]
+    try:
+        rows, next_cursor = keyset_page(query, timestamp_col, id_col, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    etag = None
+    if updated_col is not None:
+        etag = page_etag([(getattr(row, id_col.key), row[-1]) for row in rows], limit, next_cursor)
+        rows = [row[:-1] for row in rows]
+    if etag is not None and request.if_none_match.contains(etag):
+        response = not_modified(etag)
+    else:
+        response = json_response([serialize(row) for row in rows], etag=etag)
+    if next_cursor:
+        next_url = url_for(request.endpoint, **request.view_args, limit=limit, cursor=next_cursor)
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
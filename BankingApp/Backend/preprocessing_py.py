@@ -1,49 +1,167 @@
+"""
+Fits the fraud feature pipeline and writes the transformed training data.
+
+The dataset is streamed in chunks, so its size is bounded by disk rather
+than RAM:
+
+1. one pass over the categorical columns fixes the one-hot vocabulary,
+2. StandardScaler.partial_fit over the encoded chunks,
+3. IncrementalPCA.partial_fit over the scaled chunks,
+4. a last pass transforms every chunk and appends it to the output
+   (.npy, .parquet or .csv) together with Transaction_Count_24H.
+
+The dataset must be sorted by Time, like the original rolling 24h count required.
+
+    python preprocessing_py.py your_dataset.csv --output transformed_dataset.npy
+"""
+import argparse
+import os
+
 import pandas as pd
 import numpy as np
-from sklearn.decomposition import PCA
+from sklearn.decomposition import IncrementalPCA
 from sklearn.preprocessing import StandardScaler
+from feature_pipeline import (FeaturePipeline, RollingCount24h, PIPELINE_PATH, CATEGORICAL_COLS,
+                              NON_FEATURE_COLS, N_COMPONENTS)
+
+CHUNK_SIZE = 100000
+
+
+def read_chunks(path, chunk_size, columns=None):
+    return pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+
+def fit_vocabulary(path, chunk_size):
+    """Sorted categories per categorical column, as pd.get_dummies would order them."""
+    categories = {col: set() for col in CATEGORICAL_COLS}
+    for chunk in read_chunks(path, chunk_size, columns=CATEGORICAL_COLS):
+        for col in CATEGORICAL_COLS:
+            categories[col].update(chunk[col].dropna().unique().tolist())
+    return {col: sorted(values) for col, values in categories.items()}
+
+
+def encode_chunk(chunk, numerical_cols, vocabulary):
+    """
+    One-hot encodes a chunk against the fixed vocabulary, so every chunk gets
+    the same columns as pd.get_dummies(drop_first=True) on the full dataset.
+    """
+    frame = chunk[numerical_cols].copy()
+    for col in CATEGORICAL_COLS:
+        frame[col] = pd.Categorical(chunk[col], categories=vocabulary[col])
+    return pd.get_dummies(frame, columns=CATEGORICAL_COLS, drop_first=True, dtype=np.float64)
+
+
+def at_least(chunks, n_rows):
+    """Merges chunks smaller than n_rows into their predecessor; IncrementalPCA needs n_components rows per batch."""
+    pending = None
+    for chunk in chunks:
+        if pending is None:
+            pending = chunk
+        elif len(chunk) < n_rows:
+            pending = np.vstack([pending, chunk])
+        else:
+            yield pending
+            pending = chunk
+    if pending is not None:
+        yield pending
+
+
+class OutputWriter:
+    """Appends transformed chunks to a .npy, .parquet or .csv file."""
+
+    def __init__(self, path, n_rows, columns):
+        self.path = path
+        self.columns = columns
+        self.offset = 0
+        self._array = None
+        self._parquet = None
+        if path.endswith('.npy'):
+            self._array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                                    shape=(n_rows, len(columns)))
+        elif path.endswith('.parquet'):
+            try:
+                import pyarrow.parquet
+            except ImportError:
+                raise RuntimeError("Writing Parquet files requires pyarrow")
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, values):
+        if self._array is not None:
+            self._array[self.offset:self.offset + len(values)] = values
+        else:
+            frame = pd.DataFrame(values, columns=self.columns)
+            if self.path.endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if self._parquet is None:
+                    self._parquet = pq.ParquetWriter(self.path, table.schema)
+                self._parquet.write_table(table)
+            else:
+                frame.to_csv(self.path, mode='a', header=self.offset == 0, index=False)
+        self.offset += len(values)
 
-# Load dataset
-df = pd.read_csv("your_dataset.csv")
+    def close(self):
+        if self._array is not None:
+            self._array.flush()
+        if self._parquet is not None:
+            self._parquet.close()
 
-# Drop unnecessary columns
-df = df.drop(columns=["Transaction_ID"])  # Unique ID not useful for PCA
 
-# Generate Transaction Frequency Feature
-df['Transaction_Timestamp'] = pd.to_datetime(df['Time'], unit='s')  # Convert seconds to datetime
-df['Transaction_Count_24H'] = df.groupby('User_ID')['Transaction_Timestamp'].transform(
-    lambda x: x.rolling('1D', on=x).count()
-).fillna(0)  # Fill missing values with 0
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', default="your_dataset.csv")
+    parser.add_argument('--output', default="transformed_dataset.csv",
+                        help="transformed data, .npy, .parquet or .csv")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
 
-# Drop the original 'Time' column after extracting features
-df = df.drop(columns=['Time'])
+    # Raw numeric columns the online pipeline copies straight from a transaction
+    header = pd.read_csv(args.path, nrows=0).columns.tolist()
+    numerical_cols = [col for col in header if col not in CATEGORICAL_COLS + NON_FEATURE_COLS]
+    vocabulary = fit_vocabulary(args.path, args.chunk_size)
 
-# Handle categorical features (One-Hot Encoding)
-categorical_cols = ["Merchant_Category", "Transaction_Location", "Card_Type", "Device_Type",
-                    "Authentication_Method", "Payment_Gateway", "User_Age_Group", "Transaction_Channel"]
-df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
+    def encoded_chunks():
+        for chunk in read_chunks(args.path, args.chunk_size):
+            yield encode_chunk(chunk, numerical_cols, vocabulary)
 
-# Separate the Transaction Frequency column before PCA
-transaction_frequency = df[['Transaction_Count_24H']].values  # Extract as NumPy array
+    # Normalize the one-hot encoded features (Transaction Frequency is added after PCA)
+    scaler = StandardScaler()
+    feature_columns = None
+    n_rows = 0
+    for encoded in encoded_chunks():
+        feature_columns = encoded.columns
+        scaler.partial_fit(encoded)
+        n_rows += len(encoded)
 
-# Normalize numerical features (excluding Transaction Frequency)
-scaler = StandardScaler()
-df_scaled = scaler.fit_transform(df.drop(columns=['Transaction_Count_24H']))  # Scale all except frequency
+    # Reduce to 28 principal components
+    n_components = min(N_COMPONENTS, len(feature_columns))
+    pca = IncrementalPCA(n_components=n_components)
+    scaled_chunks = (scaler.transform(encoded) for encoded in encoded_chunks())
+    for scaled in at_least(scaled_chunks, n_components):
+        pca.partial_fit(scaled)
 
-# Apply PCA to reduce to 28 principal components
-pca = PCA(n_components=28)
-df_pca = pca.fit_transform(df_scaled)
+    # Save the fitted one-hot vocabulary, scaler and PCA for online scoring
+    pipeline = FeaturePipeline.from_fitted(feature_columns, numerical_cols, scaler, pca)
+    pipeline.save(PIPELINE_PATH)
 
-# Convert PCA output to DataFrame
-columns = [f'V{i+1}' for i in range(28)]
-df_pca = pd.DataFrame(df_pca, columns=columns)
+    # Transform chunk by chunk, adding the Transaction Frequency column back
+    columns = [f'V{i+1}' for i in range(n_components)] + ['Transaction_Frequency']
+    writer = OutputWriter(args.output, n_rows, columns)
+    rolling = RollingCount24h()
+    try:
+        for chunk in read_chunks(args.path, args.chunk_size):
+            counts = rolling.update(chunk['User_ID'].to_numpy(), chunk['Time'].to_numpy())
+            # The folded pipeline encodes, scales and projects in one step
+            writer.write(pipeline.transform_frame(chunk, counts))
+    finally:
+        writer.close()
 
-# Add the Transaction Frequency column back
-df_pca['Transaction_Frequency'] = transaction_frequency
+    # Explained Variance Ratio
+    explained_variance = np.sum(pca.explained_variance_ratio_)
+    print(f"Total variance explained by {n_components} components: {explained_variance:.2f}")
 
-# Save transformed data
-df_pca.to_csv("transformed_dataset.csv", index=False)
 
-# Explained Variance Ratio
-explained_variance = np.sum(pca.explained_variance_ratio_)
-print(f"Total variance explained by 28 components: {explained_variance:.2f}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
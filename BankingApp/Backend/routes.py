@@ -1,18 +1,29 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
-from models import db, User, Account, Transaction
+from models import db, User, Account, Transaction, TransferRequest
 from datetime import datetime
-from decorators import admin_required, user_account_access
+from decorators import admin_required, user_account_access, current_user_id, get_account
+from pagination import paginated_response
+from serialization import (TRANSACTION_COLUMNS, ACCOUNT_COLUMNS, transaction_row, account_row,
+                           json_response)
+from money import to_minor, to_major
+from analytics import SuspiciousActivityRules, record_transactions, record_flag, suspicious_activity
 import random
-import pandas as pd
-import kafkaProducer
-import json
+import time
+import uuid
+from transport import get_transport
 
-producer = KafkaProducer(
-    bootstrap_servers='localhost:9092',
-    value_serializer=lambda v: json.dumps(v).encode('utf-8')
-)
+def _fail_transfer(transfer_id, exc):
+    print(f"❌ Failed to enqueue transfer {transfer_id}: {exc}")
+    TransferRequest.query.filter_by(id=transfer_id, status='pending').update({'status': 'failed'})
+    db.session.commit()
 
+def _on_transfer_send_error(app, transfer_id):
+    # Runs on the transport's I/O thread once delivery has definitely failed
+    def errback(exc):
+        with app.app_context():
+            _fail_transfer(transfer_id, exc)
+    return errback
 
 
 api = Blueprint('api', __name__)
@@ -45,20 +56,25 @@ def login():
 @api.route('/accounts', methods=['GET'])
 @jwt_required()
 def get_accounts():
-    user_id = get_jwt_identity()
-    accounts = Account.query.filter_by(user_id=user_id).all()
-    return jsonify([account.to_dict() for account in accounts]), 200
+    accounts = db.session.query(*ACCOUNT_COLUMNS).filter(Account.user_id == current_user_id())
+    return json_response([account_row(row) for row in accounts])
 
 @api.route('/accounts', methods=['POST'])
 @jwt_required()
 def create_account():
     user_id = get_jwt_identity()
     data = request.get_json()
+    try:
+        initial_balance = to_minor(data.get('initial_balance', 0))
+    except ValueError:
+        return jsonify({"error": "Invalid data format"}), 400
+    if initial_balance < 0:
+        return jsonify({"error": "Initial balance cannot be negative"}), 400
     account = Account(
         account_number = str(random.randint(100000000000, 999999999999)),
         user_id=user_id,
         account_type=data['account_type'],
-        balance=data.get('initial_balance', 0)
+        balance=initial_balance
     )
     db.session.add(account)
     db.session.commit()
@@ -69,13 +85,25 @@ def create_account():
 @jwt_required()
 def create_transaction():
     data = request.get_json()
+    try:
+        amount = to_minor(data.get('amount'))
+    except ValueError:
+        return jsonify({"error": "Invalid data format"}), 400
+    if amount <= 0:
+        return jsonify({"error": "Amount must be positive"}), 400
     transaction = Transaction(
         from_account_id=data['from_account'],
         to_account_id=data['to_account'],
-        amount=data['amount'],
-        transaction_type=data['type']
+        amount=amount,
+        transaction_type=data['type'],
+        timestamp=datetime.utcnow()
     )
     db.session.add(transaction)
+    record_transactions([{
+        'from_account_id': transaction.from_account_id,
+        'amount': transaction.amount,
+        'timestamp': transaction.timestamp,
+    }])
     db.session.commit()
     return jsonify(transaction.to_dict()), 201
 
@@ -83,60 +111,88 @@ def create_transaction():
 @jwt_required()
 @user_account_access()
 def get_transactions(account_id):
-    transactions = Transaction.query.filter(
-        (Transaction.from_account_id == account_id) |
-        (Transaction.to_account_id == account_id)
-    ).all()
-    return jsonify([t.to_dict() for t in transactions]), 200
+    # One branch per (account, timestamp, id) index instead of an OR of both columns;
+    # a transfer to the same account is listed once, with the sent ones
+    sent = db.session.query(*TRANSACTION_COLUMNS).filter(Transaction.from_account_id == account_id)
+    received = db.session.query(*TRANSACTION_COLUMNS).filter(
+        Transaction.to_account_id == account_id,
+        Transaction.from_account_id != account_id
+    )
+    return paginated_response([sent, received], Transaction.timestamp, Transaction.id, transaction_row,
+                              Transaction.updated_at)
 
 # Balance Routes
 @api.route('/accounts/<account_id>/balance', methods=['GET'])
 @jwt_required()
 @user_account_access()
 def get_balance(account_id):
-    account = Account.query.get_or_404(account_id)
-    return jsonify({"balance": account.balance}), 200
+    # Reuses the account loaded by user_account_access unless ownership came from the cache
+    account = get_account(account_id)
+    return jsonify({"balance": to_major(account.balance)}), 200
 
 @api.route('/transfer', methods=['POST'])
 @jwt_required()
 def transfer_money():
     data = request.get_json()
     print(data)
-        
-    # try:
+
     from_account = Account.query.filter_by(account_number=data.get('from_account')).first_or_404()
     print(from_account)
     to_account = Account.query.filter_by(account_number=data.get('to_account')).first_or_404()
     print(to_account)
-    amount = float(data.get('amount'))  # Convert amount to float
-    # except (ValueError, TypeError):
-    #     return jsonify({"error": "Invalid data format"}), 400
+    try:
+        amount = to_minor(data.get('amount'))  # exact integer minor units
+    except ValueError:
+        return jsonify({"error": "Invalid data format"}), 400
+    if amount <= 0:
+        return jsonify({"error": "Amount must be positive"}), 400
 
-    if from_account.user_id != int(get_jwt_identity()):
+    if from_account.user_id != current_user_id():
         return jsonify({"error": "Unauthorized access"}), 403
 
     if from_account.balance < amount:
         return jsonify({"error": "Insufficient funds"}), 400
 
-    # from_account.balance -= amount
-    # to_account.balance += amount
-    
-    # transaction = Transaction(
-    #     from_account_id=from_account.id,
-    #     to_account_id=to_account.id,
-    #     amount=amount,
-    #     transaction_type='transfer'
-    # )
-    producer.send('transfer_requests', data)
-    producer.flush()
+    transfer = TransferRequest(
+        id=uuid.uuid4().hex,
+        user_id=from_account.user_id,
+        from_account_id=from_account.id,
+        to_account_id=to_account.id,
+        amount=amount
+    )
+    db.session.add(transfer)
+    db.session.commit()
 
-    # db.session.add(transaction)
-    # db.session.commit()
+    message = {
+        **data,
+        'transfer_id': transfer.id,
+        'from_account': from_account.id,
+        'to_account': to_account.id,
+        'amount': amount,
+        'Amount': to_major(amount),  # model feature, in major units like the training data
+        'user_id': from_account.user_id,
+        'Time': time.time()
+    }
+    # Keyed by the sending account so its debits are applied by one ledger partition.
+    # Sends are batched in the background; the request waits on the queue only
+    # while the producer cannot take the message, at most KAFKA_MAX_BLOCK_MS
+    try:
+        get_transport().send('transfer_requests', key=str(from_account.id).encode('utf-8'), value=message,
+                             on_error=_on_transfer_send_error(current_app._get_current_object(), transfer.id))
+    except Exception as exc:
+        # e.g. no broker reachable, or the producer buffer stayed full
+        _fail_transfer(transfer.id, exc)
+        return jsonify({
+            "error": "Transfer queue unavailable, try again later",
+            "status": "failed",
+            "transfer_id": transfer.id,
+        }), 503
 
     return jsonify({
         "message": "it is initiated",
         "status": "initiated",
-    }), 200
+        "transfer_id": transfer.id,
+    }), 202
 
     # fraud_probability = preprocess_transaction(data)
     # is_fraud = fraud_probability > 0.5
@@ -171,25 +227,35 @@ def transfer_money():
     #     "status": "Approved"
     # }), 200
 
+@api.route('/transfers/<transfer_id>', methods=['GET'])
+@jwt_required()
+def get_transfer_status(transfer_id):
+    transfer = TransferRequest.query.get_or_404(transfer_id)
+    if transfer.user_id != current_user_id():
+        return jsonify({"error": "Unauthorized access"}), 403
+    return jsonify(transfer.to_dict()), 200
+
 
 # Admin Routes
 @api.route('/admin/transactions', methods=['GET'])
 @admin_required()
 def get_all_transactions():
-    transactions = Transaction.query.all()
-    return jsonify([t.to_dict() for t in transactions]), 200
+    transactions = db.session.query(*TRANSACTION_COLUMNS)
+    return paginated_response(transactions, Transaction.timestamp, Transaction.id, transaction_row,
+                              Transaction.updated_at)
 
 @api.route('/admin/transactions/flagged', methods=['GET'])
 @admin_required()
 def get_flagged_transactions():
-    flagged = Transaction.query.filter_by(is_flagged=True).all()
-    return jsonify([t.to_dict() for t in flagged]), 200
+    flagged = db.session.query(*TRANSACTION_COLUMNS).filter(Transaction.is_flagged.is_(True))
+    return paginated_response(flagged, Transaction.timestamp, Transaction.id, transaction_row,
+                              Transaction.updated_at)
 
 @api.route('/admin/accounts', methods=['GET'])
 @admin_required()
 def get_all_accounts():
-    accounts = Account.query.all()
-    return jsonify([account.to_dict() for account in accounts]), 200
+    accounts = db.session.query(*ACCOUNT_COLUMNS)
+    return json_response([account_row(row) for row in accounts])
 
 @api.route('/admin/users', methods=['GET'])
 @admin_required()
@@ -201,6 +267,8 @@ def get_all_users():
 @admin_required()
 def flag_transaction(transaction_id):
     transaction = Transaction.query.get_or_404(transaction_id)
+    if not transaction.is_flagged:
+        record_flag(transaction)
     transaction.is_flagged = True
     transaction.flag_reason = request.json.get('reason', 'Suspicious activity')
     db.session.commit()
@@ -209,15 +277,9 @@ def flag_transaction(transaction_id):
 @api.route('/admin/analytics/suspicious', methods=['GET'])
 @admin_required()
 def get_suspicious_activity():
-    # Add logic to detect suspicious patterns
-    large_transactions = Transaction.query.filter(Transaction.amount > 10000).all()
-    frequent_transactions = Transaction.query\
-        .filter(Transaction.created_at >= datetime.utcnow().date())\
-        .group_by(Transaction.from_account_id)\
-        .having(db.func.count() > 10)\
-        .all()
-    
-    return jsonify({
-        "large_transactions": [t.to_dict() for t in large_transactions],
-        "frequent_transactions": [t.to_dict() for t in frequent_transactions]
-    }), 200
+    # Answered from the hourly rollups; thresholds can be overridden per request
+    try:
+        rules = SuspiciousActivityRules.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(suspicious_activity(rules))
@@ -0,0 +1,86 @@
+import json
+from datetime import datetime
+from flask import Response, request
+from models import Account, Transaction
+from money import to_major
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used instead
+    orjson = None
+
+# Only the columns the list endpoints return, fetched as plain row tuples
+TRANSACTION_COLUMNS = (
+    Transaction.id, Transaction.from_account_id, Transaction.to_account_id, Transaction.amount,
+    Transaction.transaction_type, Transaction.is_flagged, Transaction.flag_reason,
+    Transaction.timestamp, Transaction.created_at,
+)
+
+ACCOUNT_COLUMNS = (
+    Account.id, Account.account_number, Account.balance, Account.account_type,
+    Account.user_id, Account.created_at,
+)
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """Encodes to JSON bytes; datetimes are written like datetime.isoformat()."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200, etag=None):
+    """
+    A JSON response with an ETag, by default a strong ETag of its body. A
+    request whose If-None-Match matches gets 304 Not Modified without the body.
+    """
+    response = Response(dumps(payload), status=status, mimetype='application/json')
+    if status == 200:
+        if etag is None:
+            response.add_etag()
+        else:
+            response.set_etag(etag)
+        response.make_conditional(request)
+    return response
+
+
+def not_modified(etag):
+    """The 304 answer to a request whose If-None-Match already matches etag."""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def transaction_row(row):
+    """Transaction.to_dict() for a row of TRANSACTION_COLUMNS."""
+    id_, from_account_id, to_account_id, amount, transaction_type, is_flagged, flag_reason, timestamp, created_at = row
+    return {
+        'id': id_,
+        'from_account': from_account_id,
+        'to_account': to_account_id,
+        'amount': to_major(amount),
+        'type': transaction_type,
+        'is_flagged': is_flagged,
+        'flag_reason': flag_reason,
+        'timestamp': timestamp,
+        'created_at': created_at,
+    }
+
+
+def account_row(row):
+    """Account.to_dict() for a row of ACCOUNT_COLUMNS."""
+    id_, account_number, balance, account_type, user_id, created_at = row
+    return {
+        'id': id_,
+        'account_number': "X"*8+account_number[:4],
+        'balance': to_major(balance),
+        'account_type': account_type,
+        'user_id': user_id,
+        'created_at': created_at,
+    }
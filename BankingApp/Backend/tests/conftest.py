@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other by bare name, as when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A bare app on a fresh SQLite database with every table created."""
+    from flask import Flask
+    from models import db
+    from database import init_db
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app, f"sqlite:///{tmp_path / 'test.db'}")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def accounts(app):
+    """Two users with one account each, holding 1000.00 (100000 minor units)."""
+    from models import db, User, Account
+
+    ids = []
+    for i in (1, 2):
+        user = User(username=f"user{i}", email=f"user{i}@example.com")
+        db.session.add(user)
+        db.session.flush()
+        account = Account(account_number=f"{i:012d}", balance=100000, account_type='Savings', user_id=user.id)
+        db.session.add(account)
+        db.session.flush()
+        ids.append((user.id, account.id))
+    db.session.commit()
+    return ids
+
+
+@pytest.fixture
+def api_client(app):
+    """A test client for the API blueprint; auth_headers() signs in as a user."""
+    from flask_jwt_extended import JWTManager
+    import routes
+
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-with-at-least-32-bytes'
+    JWTManager(app)
+    app.register_blueprint(routes.api, url_prefix='/api')
+    return app.test_client()
+
+
+def auth_headers(user_id):
+    from flask_jwt_extended import create_access_token
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+from analytics import SuspiciousActivityRules, rebuild_rollups, record_transactions, suspicious_activity
+from conftest import auth_headers
+from models import db, Transaction, TransactionRollup, User
+
+NOW = datetime(2026, 1, 15, 12, 30)
+
+
+def add_transactions(accounts, amounts, start=NOW - timedelta(hours=2)):
+    (_, from_id), (_, to_id) = accounts
+    rows = [
+        {'from_account_id': from_id, 'to_account_id': to_id, 'amount': amount, 'transaction_type': 'transfer',
+         'timestamp': start + timedelta(minutes=i), 'created_at': start + timedelta(minutes=i)}
+        for i, amount in enumerate(amounts)
+    ]
+    db.session.execute(insert(Transaction), rows)
+    record_transactions(rows)
+    db.session.commit()
+
+
+def test_suspicious_activity_keeps_transaction_lists(accounts):
+    add_transactions(accounts, [100] * 11 + [2000000])
+    rules = SuspiciousActivityRules(large_amount=10000, velocity=10)
+
+    result = suspicious_activity(rules, now=NOW)
+
+    assert [t['amount'] for t in result['large_transactions']] == [20000.0]
+    assert len(result['frequent_transactions']) == 1
+    assert result['frequent_transactions'][0]['from_account'] == accounts[0][1]
+    assert result['high_velocity_accounts'][0]['transaction_count'] == 12
+    assert result['large_amount_accounts'][0]['max_amount'] == 20000.0
+    assert result['top_accounts'][0]['total_amount'] == 20011.0
+
+
+def test_rebuild_matches_incremental_rollups(accounts):
+    add_transactions(accounts, [100, 250, 5000])
+    incremental = db.session.query(TransactionRollup.account_id, TransactionRollup.hour, TransactionRollup.count,
+                                   TransactionRollup.total_amount, TransactionRollup.max_amount).all()
+
+    rebuild_rollups()
+
+    rebuilt = db.session.query(TransactionRollup.account_id, TransactionRollup.hour, TransactionRollup.count,
+                               TransactionRollup.total_amount, TransactionRollup.max_amount).all()
+    assert sorted(rebuilt) == sorted(incremental)
+
+
+def test_rebuild_uses_created_at_for_missing_timestamps(accounts):
+    add_transactions(accounts, [100, 200])
+    db.session.execute(update(Transaction).values(timestamp=None))
+    db.session.commit()
+
+    rebuild_rollups()
+
+    assert db.session.query(db.func.sum(TransactionRollup.count)).scalar() == 2
+
+
+@pytest.mark.parametrize("large_amount", ["inf", "nan", "1e30"])
+def test_rules_reject_thresholds_that_are_not_amounts(large_amount):
+    with pytest.raises(ValueError):
+        SuspiciousActivityRules(large_amount=float(large_amount))
+
+
+@pytest.mark.parametrize("query, status", [("large_amount=5000", 200), ("large_amount=inf", 400),
+                                           ("large_amount=1e30", 400)])
+def test_suspicious_endpoint_validates_the_threshold(api_client, accounts, monkeypatch, query, status):
+    import decorators
+
+    monkeypatch.setattr(decorators, 'user_roles', decorators.TTLCache(0))
+    admin_id, _ = accounts[0]
+    db.session.get(User, admin_id).role = 'admin'
+    db.session.commit()
+
+    response = api_client.get(f'/api/admin/analytics/suspicious?{query}', headers=auth_headers(admin_id))
+
+    assert response.status_code == status
+    if status == 400:
+        assert 'amount' in response.get_json()['error']
@@ -0,0 +1,45 @@
+from argparse import Namespace
+
+import numpy as np
+import pandas as pd
+
+import backfill
+from models import db, Transaction
+
+
+def backfill_args(**overrides):
+    args = dict(chunk_size=2, threshold=0.5, from_account_col='From_Account', to_account_col='To_Account',
+                transaction_type='transfer')
+    return Namespace(**{**args, **overrides})
+
+
+def test_rows_carry_every_column_the_copy_path_writes(app, accounts, monkeypatch, tmp_path):
+    # Scores follow the amount, so the 2nd and 3rd rows are flagged
+    monkeypatch.setattr(backfill, 'score_frame', lambda frame, counts: (frame['Amount'].to_numpy() > 50) * 0.9)
+    path = tmp_path / 'history.csv'
+    path.write_text("Time,User_ID,Amount,From_Account,To_Account\n"
+                    "0,1,10.5,000000000001,000000000002\n"
+                    "60,1,99.99,000000000001,000000000002\n"
+                    "120,2,1234.56,000000000002,000000000001\n"
+                    "180,2,1.00,000000000002,999999999999\n")
+
+    totals = backfill.backfill(str(path), backfill_args())
+
+    assert (totals['imported'], totals['flagged'], totals['skipped']) == (3, 2, 1)
+    rows = Transaction.query.order_by(Transaction.id).all()
+    assert [row.amount for row in rows] == [1050, 9999, 123456]
+    assert [row.is_flagged for row in rows] == [False, True, True]
+    assert all(row.updated_at is not None and row.updated_at == row.created_at for row in rows)
+
+
+def test_copied_rows_set_updated_at(app, accounts, monkeypatch):
+    inserted = []
+    monkeypatch.setattr(backfill, 'insert_transactions', inserted.extend)
+    monkeypatch.setattr(backfill, 'score_frame', lambda frame, counts: np.zeros(len(frame)))
+    chunk = pd.DataFrame({'Time': [0.0], 'User_ID': [1], 'Amount': [5.0],
+                          'From_Account': ['000000000001'], 'To_Account': ['000000000002']})
+
+    backfill.import_chunk(chunk, np.ones(1), backfill.AccountResolver(), backfill_args())
+
+    assert {'timestamp', 'created_at', 'updated_at', 'ml_analysis_timestamp'} <= inserted[0].keys()
+    db.session.rollback()
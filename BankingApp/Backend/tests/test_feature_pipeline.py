@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from feature_pipeline import FeaturePipeline, CATEGORICAL_COLS
+
+
+def make_transactions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "Amount": rng.gamma(2.0, 500.0, n),
+        "Time": np.sort(rng.uniform(0, 5 * 86400, n)),
+        "Transaction_ID": np.arange(n),
+    })
+    for i, col in enumerate(CATEGORICAL_COLS):
+        frame[col] = rng.choice([f"{col[:3]}{j}" for j in range(3 + i % 3)], n)
+    return frame
+
+
+def fit(frame, n_components=5):
+    numerical_cols = ["Amount"]
+    encoded = pd.get_dummies(frame[numerical_cols + CATEGORICAL_COLS], columns=CATEGORICAL_COLS,
+                             drop_first=True, dtype=np.float64)
+    scaler = StandardScaler().fit(encoded)
+    pca = PCA(n_components=n_components).fit(scaler.transform(encoded))
+    pipeline = FeaturePipeline.from_fitted(encoded.columns, numerical_cols, scaler, pca)
+    return pipeline, pca.transform(scaler.transform(encoded))
+
+
+def test_folded_pipeline_matches_sklearn():
+    frame = make_transactions(500)
+    pipeline, expected = fit(frame)
+    counts = np.arange(len(frame))
+
+    features = pipeline.transform(frame.to_dict("records"), counts)
+
+    np.testing.assert_allclose(features[:, :-1], expected, rtol=1e-4, atol=1e-4)
+    np.testing.assert_array_equal(features[:, -1], counts)
+
+
+def test_transform_frame_matches_transform():
+    frame = make_transactions(200)
+    pipeline, _ = fit(frame)
+    counts = np.ones(len(frame))
+
+    np.testing.assert_array_equal(pipeline.transform_frame(frame, counts),
+                                  pipeline.transform(frame.to_dict("records"), counts))
+
+
+def test_unseen_and_dropped_categories_encode_to_zeros():
+    frame = make_transactions(100)
+    pipeline, _ = fit(frame)
+    first = sorted(frame[CATEGORICAL_COLS[0]].unique())[0]
+
+    encoded = pipeline.encode([{"Amount": 1.0, CATEGORICAL_COLS[0]: first},
+                               {"Amount": 1.0, CATEGORICAL_COLS[0]: "never seen"}])
+
+    np.testing.assert_array_equal(encoded[0], encoded[1])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    frame = make_transactions(100)
+    pipeline, _ = fit(frame)
+    path = str(tmp_path / "pipeline.npz")
+    pipeline.save(path)
+
+    loaded = FeaturePipeline.load(path)
+
+    assert loaded.feature_columns == pipeline.feature_columns
+    np.testing.assert_array_equal(loaded.transform_frame(frame, np.zeros(len(frame))),
+                                  pipeline.transform_frame(frame, np.zeros(len(frame))))
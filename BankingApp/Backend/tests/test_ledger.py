@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import ledger as ledger_module
+from ledger import LedgerEngine, LedgerPartition, COMPLETED, INSUFFICIENT_FUNDS, UNAUTHORIZED
+from models import db, Account, LedgerOffset, Transaction
+
+
+def records(accounts, amounts, start=0):
+    (user_id, from_id), (_, to_id) = accounts
+    return [
+        (start + i, {'user_id': user_id, 'from_account': from_id, 'to_account': to_id, 'amount': amount}, 0.0)
+        for i, amount in enumerate(amounts)
+    ]
+
+
+def balances(accounts):
+    db.session.expire_all()
+    return [db.session.get(Account, account_id).balance for _, account_id in accounts]
+
+
+def test_replay_is_idempotent(accounts):
+    batch = records(accounts, [100, 200, 300])
+    LedgerEngine().process({0: batch})
+
+    # A restarted consumer reloads the offset and skips what was committed
+    outcomes = LedgerEngine().process({0: batch + records(accounts, [400], start=3)})
+
+    assert [offset for offset, _, _ in outcomes] == [3]
+    assert balances(accounts) == [100000 - 1000, 100000 + 1000]
+    assert db.session.query(Transaction).count() == 4
+    assert db.session.get(LedgerOffset, 0).committed_offset == 3
+
+
+def test_rejections_write_nothing(accounts):
+    (_, from_id), (_, to_id) = accounts
+    batch = records(accounts, [100001, 500]) + [
+        (2, {'user_id': accounts[1][0], 'from_account': from_id, 'to_account': to_id, 'amount': 1}, 0.0)]
+
+    outcomes = LedgerEngine().process({0: batch})
+
+    assert [outcome for _, _, outcome in outcomes] == [INSUFFICIENT_FUNDS, COMPLETED, UNAUTHORIZED]
+    assert balances(accounts) == [100000 - 500, 100000 + 500]
+    assert db.session.get(LedgerOffset, 0).committed_offset == 2
+
+
+def test_commits_in_groups(accounts):
+    committed = []
+
+    LedgerEngine().process({0: records(accounts, [1] * 5)},
+                           on_commit=lambda partition, applied: committed.append(len(applied)), group_size=2)
+
+    assert committed == [2, 2, 1]
+    assert db.session.get(LedgerOffset, 0).committed_offset == 4
+
+
+def test_retries_a_locked_database(monkeypatch, accounts):
+    monkeypatch.setattr(ledger_module, 'RETRY_BACKOFF_MS', 0)
+    flush = LedgerPartition.flush
+    failures = [OperationalError('UPDATE', {}, Exception('database is locked'))]
+
+    def flaky_flush(self):
+        if failures:
+            db.session.rollback()
+            self.reset()
+            raise failures.pop()
+        return flush(self)
+
+    monkeypatch.setattr(LedgerPartition, 'flush', flaky_flush)
+
+    LedgerEngine().process({0: records(accounts, [100, 200])})
+
+    assert balances(accounts) == [100000 - 300, 100000 + 300]
+    assert db.session.query(Transaction).count() == 2
+
+
+def test_other_errors_are_not_retried(monkeypatch, accounts):
+    def failing_flush(self):
+        raise OperationalError('UPDATE', {}, Exception('no such table: account'))
+
+    monkeypatch.setattr(LedgerPartition, 'flush', failing_flush)
+
+    with pytest.raises(OperationalError):
+        LedgerEngine().process({0: records(accounts, [100])})
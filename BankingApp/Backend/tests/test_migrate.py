@@ -0,0 +1,57 @@
+from flask import Flask
+from sqlalchemy import inspect, text, Integer
+
+from database import init_db
+from migrate import migrate_database
+from models import db, TransactionRollup
+
+
+def old_database(tmp_path):
+    """An app on a database created before minor units, rollups and Transaction.updated_at."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app, f"sqlite:///{tmp_path / 'old.db'}")
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE account (id INTEGER PRIMARY KEY, account_number VARCHAR(20), balance FLOAT NOT NULL, "
+            "account_type VARCHAR(20), user_id INTEGER, created_at DATETIME)"))
+        connection.execute(text(
+            'CREATE TABLE "transaction" (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, '
+            'transaction_type VARCHAR(20), is_flagged BOOLEAN, created_at DATETIME, timestamp DATETIME, '
+            'from_account_id INTEGER, to_account_id INTEGER)'))
+        connection.execute(text("INSERT INTO account (balance) VALUES (10500.0)"))
+        connection.execute(text(
+            'INSERT INTO "transaction" (amount, is_flagged, timestamp, from_account_id, to_account_id) VALUES '
+            "(12.5, 0, '2026-01-15 10:05:00', 1, 2), (7.25, 1, '2026-01-15 10:45:00', 1, 2)"))
+    return app
+
+
+def test_migrates_an_old_database_once(tmp_path):
+    app = old_database(tmp_path)
+    with app.app_context():
+        assert migrate_database() == ['account.balance', 'transaction.amount']
+        assert migrate_database() == []
+
+        inspector = inspect(db.engine)
+        columns = {column['name']: column['type'] for column in inspector.get_columns('transaction')}
+        assert isinstance(columns['amount'], Integer)
+        assert 'updated_at' in columns
+        assert 'ix_transaction_timestamp' in {index['name'] for index in inspector.get_indexes('transaction')}
+        assert 'transfer_request' in inspector.get_table_names()
+        assert db.session.execute(text("SELECT balance FROM account")).scalar() == 1050000
+        rollup = TransactionRollup.query.one()
+        assert (rollup.account_id, rollup.count, rollup.total_amount, rollup.max_amount, rollup.flagged_count) \
+            == (1, 2, 1975, 1250, 1)
+
+
+def test_existing_rollups_are_not_rebuilt(tmp_path):
+    app = old_database(tmp_path)
+    with app.app_context():
+        migrate_database()
+        TransactionRollup.query.update({'count': 5})
+        db.session.commit()
+
+        migrate_database()
+
+        assert TransactionRollup.query.one().count == 5
+
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, text, Integer
+
+from migrate_money import migrate
+from money import MAX_MINOR, to_major, to_minor, to_minor_array
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0.1, 10),
+    ("12.345", 1235),
+    ("-12.345", -1235),
+    (12, 1200),
+    ("92233720368547758.07", MAX_MINOR),
+])
+def test_to_minor(value, expected):
+    assert to_minor(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    None, True, "abc", "", float("inf"), float("nan"), "1e30", 1e300, "92233720368547758.08",
+])
+def test_to_minor_rejects(value):
+    with pytest.raises(ValueError):
+        to_minor(value)
+
+
+def test_to_minor_array():
+    assert to_minor_array([0.1, 12.34, -12.345, 0]).tolist() == [10, 1234, -1234, 0]
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -float("inf"), 1e30, 2.0 ** 63 / 100])
+def test_to_minor_array_rejects(value):
+    with pytest.raises(ValueError):
+        to_minor_array(np.array([1.0, value]))
+
+
+def test_to_major_round_trips():
+    assert to_major(to_minor("1234.56")) == 1234.56
+
+
+def test_migrate_converts_float_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE account (id INTEGER PRIMARY KEY, balance FLOAT NOT NULL)"))
+        connection.execute(text("INSERT INTO account (balance) VALUES (10500.0), (0.1), (19.995)"))
+
+    assert migrate(engine) == ["account.balance"]
+    assert migrate(engine) == []
+
+    column = next(info for info in inspect(engine).get_columns('account') if info['name'] == 'balance')
+    assert isinstance(column['type'], Integer)
+    with engine.connect() as connection:
+        balances = connection.execute(text("SELECT balance FROM account ORDER BY id")).scalars().all()
+    assert balances == [1050000, 10, 2000]
+
+
+@pytest.mark.parametrize("interrupted_after, columns", [
+    ("add", "balance FLOAT NOT NULL, balance_minor BIGINT NOT NULL DEFAULT 0"),
+    ("drop", "balance_minor BIGINT NOT NULL DEFAULT 0"),
+])
+def test_migrate_resumes_an_interrupted_run(tmp_path, interrupted_after, columns):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE TABLE account (id INTEGER PRIMARY KEY, {columns})"))
+        if interrupted_after == "add":
+            connection.execute(text("INSERT INTO account (balance) VALUES (10500.0)"))
+        else:
+            connection.execute(text("INSERT INTO account (balance_minor) VALUES (1050000)"))
+
+    assert migrate(engine) == ["account.balance"]
+    assert migrate(engine) == []
+
+    names = [info['name'] for info in inspect(engine).get_columns('account')]
+    assert names == ['id', 'balance']
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT balance FROM account")).scalar() == 1050000
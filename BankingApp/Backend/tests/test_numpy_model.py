@@ -0,0 +1,70 @@
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from numpy_model import NumpyFraudModel, export_numpy_weights
+
+tf = pytest.importorskip("tensorflow")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_model(n_features=29, seed=0):
+    tf.keras.utils.set_random_seed(seed)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(n_features,)),
+        tf.keras.layers.Dense(32),
+        tf.keras.layers.BatchNormalization(),
+        tf.keras.layers.LeakyReLU(negative_slope=0.1),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(16, activation="relu"),
+        tf.keras.layers.BatchNormalization(),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    # Non-trivial moving statistics, so the BatchNorm fold is exercised
+    rng = np.random.default_rng(seed)
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.layers.BatchNormalization):
+            size = layer.get_weights()[0].shape[0]
+            layer.set_weights([rng.uniform(0.5, 2.0, size), rng.normal(size=size),
+                               rng.normal(size=size), rng.uniform(0.5, 3.0, size)])
+    return model
+
+
+def test_numpy_model_matches_keras(tmp_path):
+    model = build_model()
+    path = export_numpy_weights(model, str(tmp_path / "model.npz"))
+    features = np.random.default_rng(1).normal(size=(256, 29)).astype(np.float32)
+
+    expected = model(features, training=False).numpy()
+
+    np.testing.assert_allclose(NumpyFraudModel.load(path).predict(features), expected, rtol=1e-4, atol=1e-5)
+
+
+def test_sigmoid_saturates_without_overflow(tmp_path):
+    model = build_model()
+    path = export_numpy_weights(model, str(tmp_path / "model.npz"))
+    features = np.full((2, 29), 1e6, dtype=np.float32)
+    features[1] *= -1
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        probabilities = NumpyFraudModel.load(path).predict(features)
+
+    assert np.all((probabilities >= 0) & (probabilities <= 1))
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(BACKEND_DIR, "credit_card_fraud_detect_NN_model.npz")),
+                    reason="no exported model")
+def test_shipped_export_matches_shipped_keras_model():
+    from inference import MODEL_PATH, load_keras_model
+    from numpy_model import NUMPY_MODEL_PATH
+
+    model = load_keras_model(os.path.join(BACKEND_DIR, MODEL_PATH))
+    exported = NumpyFraudModel.load(os.path.join(BACKEND_DIR, NUMPY_MODEL_PATH))
+    features = np.random.default_rng(2).normal(size=(128, exported.n_features)).astype(np.float32)
+
+    np.testing.assert_allclose(exported.predict(features), model(features, training=False).numpy(),
+                               rtol=1e-4, atol=1e-5)
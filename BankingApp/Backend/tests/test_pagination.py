@@ -0,0 +1,118 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from conftest import auth_headers
+from models import db, Transaction
+from pagination import paginated_response
+from serialization import TRANSACTION_COLUMNS, transaction_row
+
+
+@pytest.fixture
+def client(app):
+    serialized = []
+
+    def serialize(row):
+        serialized.append(row)
+        return transaction_row(row)
+
+    def list_transactions():
+        query = db.session.query(*TRANSACTION_COLUMNS)
+        return paginated_response(query, Transaction.timestamp, Transaction.id, serialize, Transaction.updated_at)
+
+    app.add_url_rule('/transactions', view_func=list_transactions)
+    client = app.test_client()
+    client.serialized = serialized
+    return client
+
+
+@pytest.fixture
+def transactions(accounts):
+    (_, from_id), (_, to_id) = accounts
+    start = datetime(2026, 1, 1)
+    db.session.execute(insert(Transaction), [
+        {'from_account_id': from_id, 'to_account_id': to_id, 'amount': 100, 'transaction_type': 'transfer',
+         'timestamp': start + timedelta(minutes=i)}
+        for i in range(5)
+    ])
+    db.session.commit()
+
+
+def page(client, headers=None, **args):
+    return client.get('/transactions', query_string=args, headers=headers)
+
+
+def record_statements():
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_unchanged_page_is_not_serialized(client, transactions):
+    first = page(client, limit=2)
+    del client.serialized[:]
+    statements = record_statements()
+
+    second = page(client, headers={'If-None-Match': first.headers['ETag']}, limit=2)
+
+    assert first.status_code == 200 and len(first.get_json()) == 2
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor']
+    assert client.serialized == []
+    # Only the page itself is read, through LIMIT
+    assert len(statements) == 1 and 'LIMIT' in statements[0]
+
+
+def test_etag_follows_page_arguments_and_updates(client, transactions):
+    first = page(client, limit=2)
+    etag = first.headers['ETag']
+
+    assert page(client, limit=2, cursor=first.headers['X-Next-Cursor']).headers['ETag'] != etag
+    assert page(client, limit=3).headers['ETag'] != etag
+
+    # The first page holds the two newest transactions, 5 and 4
+    for transaction_id in (1, 5):
+        db.session.get(Transaction, transaction_id).is_flagged = True
+        db.session.commit()
+        if transaction_id == 1:
+            assert page(client, headers={'If-None-Match': etag}, limit=2).status_code == 304
+
+    changed = page(client, headers={'If-None-Match': etag}, limit=2)
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_account_listing_pages_through_both_branches(api_client, accounts):
+    (user_id, account_id), (_, other_id) = accounts
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(23):
+        # Sent, received and self transfers, with timestamps shared by several rows
+        from_id, to_id = [(account_id, other_id), (other_id, account_id), (account_id, account_id)][i % 3]
+        rows.append({'from_account_id': from_id, 'to_account_id': to_id, 'amount': 100 + i,
+                     'transaction_type': 'transfer', 'timestamp': start + timedelta(minutes=i // 2)})
+    rows.append({'from_account_id': other_id, 'to_account_id': other_id, 'amount': 1,
+                 'transaction_type': 'transfer', 'timestamp': start})
+    db.session.execute(insert(Transaction), rows)
+    db.session.commit()
+    expected = [row.id for row in db.session.query(Transaction.id).filter(
+        (Transaction.from_account_id == account_id) | (Transaction.to_account_id == account_id)
+    ).order_by(Transaction.timestamp.desc(), Transaction.id.desc())]
+
+    listed, cursor = [], None
+    while True:
+        args = {'limit': 4, **({'cursor': cursor} if cursor else {})}
+        response = api_client.get(f'/api/transactions/{account_id}', query_string=args, headers=auth_headers(user_id))
+        listed += [transaction['id'] for transaction in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    streamed = api_client.get(f'/api/transactions/{account_id}', query_string={'format': 'ndjson'},
+                              headers=auth_headers(user_id))
+
+    assert len(expected) == 23
+    assert listed == expected
+    assert [json.loads(line)['id'] for line in streamed.data.splitlines()] == expected
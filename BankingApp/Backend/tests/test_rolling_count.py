@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_pipeline import DAY_SECONDS, RollingCount24h, rolling_count_24h
+
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Whole seconds, so several rows share a timestamp and some sit exactly 24h apart
+    times = np.sort(rng.integers(0, 4 * DAY_SECONDS, n) // 3600 * 3600).astype(np.float64)
+    users = rng.integers(0, 20, n)
+    return users, times
+
+
+def pandas_count(users, times):
+    frame = pd.DataFrame({"u": users, "ts": pd.to_datetime(times, unit="s"), "one": 1.0})
+    counts = frame.set_index("ts").groupby("u")["one"].transform(lambda x: x.rolling("1D").sum())
+    return counts.to_numpy().astype(np.int64)
+
+
+def test_matches_pandas_rolling():
+    users, times = make_rows(2000)
+
+    np.testing.assert_array_equal(rolling_count_24h(users, times), pandas_count(users, times))
+
+
+def test_unsorted_rows_keep_input_order():
+    users, times = make_rows(500, seed=1)
+    # Rows with equal times count in input order, so only distinct times are order-free
+    times = times + np.arange(len(times))
+    shuffle = np.random.default_rng(2).permutation(len(users))
+
+    np.testing.assert_array_equal(rolling_count_24h(users[shuffle], times[shuffle]),
+                                  rolling_count_24h(users, times)[shuffle])
+
+
+def test_empty_input():
+    assert rolling_count_24h([], []).shape == (0,)
+
+
+def test_chunks_match_whole_dataset():
+    users, times = make_rows(2000, seed=3)
+    counter = RollingCount24h()
+
+    chunked = np.concatenate([counter.update(users[start:start + 300], times[start:start + 300])
+                              for start in range(0, len(users), 300)])
+
+    np.testing.assert_array_equal(chunked, rolling_count_24h(users, times))
+
+
+def test_chunks_must_be_time_ordered_per_user():
+    counter = RollingCount24h()
+    counter.update([1, 2], [100.0, 50.0])
+
+    with pytest.raises(ValueError):
+        counter.update([1], [90.0])
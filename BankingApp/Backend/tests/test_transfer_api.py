@@ -0,0 +1,44 @@
+import routes
+from conftest import auth_headers
+from models import db, Account, TransferRequest
+
+
+class UnreachableTransport:
+    def send(self, topic, key, value, on_error=None):
+        raise TimeoutError("Failed to update metadata after 0.5 secs.")
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, topic, key, value, on_error=None):
+        self.sent.append(value)
+
+
+def transfer(client, accounts, amount=10):
+    (user_id, from_id), (_, to_id) = accounts
+    numbers = [db.session.get(Account, account_id).account_number for account_id in (from_id, to_id)]
+    return client.post('/api/transfer', headers=auth_headers(user_id),
+                       json={'from_account': numbers[0], 'to_account': numbers[1], 'amount': amount})
+
+
+def test_transfer_is_queued(api_client, accounts, monkeypatch):
+    transport = RecordingTransport()
+    monkeypatch.setattr(routes, 'get_transport', lambda: transport)
+
+    response = transfer(api_client, accounts)
+
+    assert response.status_code == 202
+    assert transport.sent[0]['amount'] == 1000
+    assert db.session.get(TransferRequest, response.get_json()['transfer_id']).status == 'pending'
+
+
+def test_unreachable_queue_fails_the_transfer(api_client, accounts, monkeypatch):
+    monkeypatch.setattr(routes, 'get_transport', lambda: UnreachableTransport())
+
+    response = transfer(api_client, accounts)
+
+    assert response.status_code == 503
+    db.session.expire_all()
+    assert db.session.get(TransferRequest, response.get_json()['transfer_id']).status == 'failed'
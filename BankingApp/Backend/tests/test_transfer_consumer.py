@@ -0,0 +1,130 @@
+import time
+
+import numpy as np
+import pytest
+
+import transfer_consumer
+from ledger import LedgerEngine
+from models import db, Account
+from transport import TransportMessage
+from velocity import VelocityStore
+
+
+@pytest.fixture
+def consumer(monkeypatch, app):
+    """process_batch with a fresh ledger and velocity store, scoring every transfer as legitimate."""
+    seen_counts = []
+
+    def build_batch_features(transfers, counts):
+        seen_counts.append(list(counts))
+        return np.zeros((len(transfers), 1), dtype=np.float32)
+
+    monkeypatch.setattr(transfer_consumer, 'velocity', VelocityStore())
+    monkeypatch.setattr(transfer_consumer, 'ledger', LedgerEngine())
+    monkeypatch.setattr(transfer_consumer, 'build_batch_features', build_batch_features)
+    monkeypatch.setattr(transfer_consumer, 'predict_fraud', lambda features: np.zeros(len(features)))
+    return seen_counts
+
+
+def transfer_messages(accounts, n, partition=0, start_time=1000.0):
+    (user_id, from_id), (_, to_id) = accounts
+    return [
+        TransportMessage('transfer_requests', partition, offset, None, {
+            'user_id': user_id, 'from_account': from_id, 'to_account': to_id,
+            'amount': 100, 'Time': start_time + offset,
+        })
+        for offset in range(n)
+    ]
+
+
+def balances(accounts):
+    db.session.expire_all()
+    return [db.session.get(Account, account_id).balance for _, account_id in accounts]
+
+
+def test_counts_include_earlier_transfers_of_the_batch(consumer, accounts):
+    transfer_consumer.process_batch(transfer_messages(accounts, 3))
+
+    assert consumer == [[1, 2, 3]]
+    assert transfer_consumer.velocity.transaction_count_24h(accounts[0][0], now=1003.0) == 3
+
+
+def test_replayed_batch_is_neither_applied_nor_counted_twice(consumer, accounts):
+    messages = transfer_messages(accounts, 3)
+    transfer_consumer.process_batch(messages)
+
+    transfer_consumer.process_batch(messages)
+
+    assert balances(accounts) == [100000 - 300, 100000 + 300]
+    assert transfer_consumer.velocity.transaction_count_24h(accounts[0][0], now=1003.0) == 3
+
+
+def test_failed_batch_is_not_counted(consumer, accounts, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(transfer_consumer.ledger, 'process', fail)
+    with pytest.raises(RuntimeError):
+        transfer_consumer.process_batch(transfer_messages(accounts, 2))
+
+    assert transfer_consumer.velocity.transaction_count_24h(accounts[0][0], now=1002.0) == 0
+
+
+def test_consumer_survives_a_failed_batch_and_replays_it(consumer, accounts, app, monkeypatch):
+    import threading
+    from transport import InProcessTransport
+
+    monkeypatch.setattr(transfer_consumer.velocity, 'save', lambda path: None)
+    monkeypatch.setattr(transfer_consumer, 'RETRY_BACKOFF_MS', 1)
+    transport = InProcessTransport(n_partitions=1, linger_ms=0)
+    (user_id, from_id), (_, to_id) = accounts
+    for i in range(5):
+        transport.send(transfer_consumer.TRANSFER_TOPIC, b'key', {
+            'user_id': user_id, 'from_account': from_id, 'to_account': to_id, 'amount': 100, 'Time': 1000.0 + i})
+
+    process_batch = transfer_consumer.process_batch
+    calls = []
+
+    def flaky_process_batch(messages):
+        calls.append(len(messages))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return process_batch(messages)
+
+    monkeypatch.setattr(transfer_consumer, 'process_batch', flaky_process_batch)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=transfer_consumer.run_consumer, args=(app, transport, stop_event))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while transport.pending(transfer_consumer.TRANSFER_TOPIC) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop_event.set()
+    thread.join(5)
+
+    assert calls[:2] == [5, 5]
+    assert transport.pending(transfer_consumer.TRANSFER_TOPIC) == 0
+    assert balances(accounts) == [100000 - 500, 100000 + 500]
+
+
+def test_consumer_stops_on_a_missing_artifact(consumer, app, monkeypatch, tmp_path):
+    import model_processing
+    from model_processing import MissingArtifactError
+    from transport import InProcessTransport
+
+    monkeypatch.setattr(transfer_consumer.velocity, 'save', lambda path: None)
+    monkeypatch.setattr(model_processing, 'PIPELINE_PATH', str(tmp_path / 'missing.npz'))
+    # Score through the real pipeline loader
+    monkeypatch.setattr(transfer_consumer, 'build_batch_features',
+                        lambda transfers, counts: model_processing.models.get('feature_pipeline'))
+    transport = InProcessTransport(n_partitions=1, linger_ms=0)
+    transport.send(transfer_consumer.TRANSFER_TOPIC, b'key', {'user_id': 1, 'from_account': 1, 'to_account': 2,
+                                                               'amount': 100, 'Time': 1000.0})
+    calls = []
+    process_batch = transfer_consumer.process_batch
+    monkeypatch.setattr(transfer_consumer, 'process_batch',
+                        lambda messages: calls.append(len(messages)) or process_batch(messages))
+
+    with pytest.raises(MissingArtifactError, match='preprocessing_py.py'):
+        transfer_consumer.run_consumer(app, transport)
+
+    assert calls == [1]
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from transport import Transport, InProcessTransport, SqliteTransport, partition_for
+
+TOPIC = 'transfer_requests'
+GROUP = 'test_group'
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_transport(request, tmp_path):
+    def make(**kwargs):
+        if request.param == 'memory':
+            return InProcessTransport(n_partitions=4, **kwargs)
+        return SqliteTransport(str(tmp_path / 'queue.db'), n_partitions=4, **kwargs)
+    return make
+
+
+def drain(transport, max_records=500):
+    messages = []
+    while True:
+        batch = transport.poll(timeout_ms=50, max_records=max_records)
+        if not batch:
+            return messages
+        for partition_messages in batch.values():
+            messages.extend(partition_messages)
+
+
+def test_sends_are_batched_for_linger_ms(make_transport):
+    transport = make_transport(linger_ms=200)
+    transport.subscribe(TOPIC, GROUP)
+    for i in range(10):
+        transport.send(TOPIC, b'key', {'i': i})
+
+    assert transport.poll(timeout_ms=0) == {}
+
+    time.sleep(0.4)
+    messages = drain(transport)
+    assert [message.value['i'] for message in messages] == list(range(10))
+
+
+def test_flush_writes_pending_messages(make_transport):
+    transport = make_transport(linger_ms=10000)
+    transport.subscribe(TOPIC, GROUP)
+    transport.send(TOPIC, b'key', {'i': 0})
+
+    transport.flush()
+
+    assert [message.value for message in drain(transport)] == [{'i': 0}]
+
+
+def test_same_key_keeps_order_in_one_partition(make_transport):
+    transport = make_transport(linger_ms=0)
+    transport.subscribe(TOPIC, GROUP)
+    for i in range(20):
+        transport.send(TOPIC, str(i % 3).encode(), {'key': i % 3, 'i': i})
+
+    messages = drain(transport, max_records=7)
+
+    for key in range(3):
+        own = [message for message in messages if message.value['key'] == key]
+        assert [message.value['i'] for message in own] == list(range(key, 20, 3))
+        assert {message.partition for message in own} == {partition_for(str(key).encode(), 4)}
+        assert [message.offset for message in own] == sorted(message.offset for message in own)
+
+
+def test_rewind_replays_uncommitted_messages(make_transport):
+    transport = make_transport(linger_ms=0)
+    transport.subscribe(TOPIC, GROUP)
+    for i in range(6):
+        transport.send(TOPIC, b'key', {'i': i})
+    first = transport.poll(timeout_ms=50, max_records=2)
+    transport.commit()
+    assert [message.value['i'] for message in drain(transport)] == [2, 3, 4, 5]
+
+    transport.rewind()
+
+    assert [message.value['i'] for messages in first.values() for message in messages] == [0, 1]
+    assert [message.value['i'] for message in drain(transport)] == [2, 3, 4, 5]
+
+
+def test_transport_interface_is_abstract():
+    class Incomplete(Transport):
+        def send(self, topic, key, value, on_error=None):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
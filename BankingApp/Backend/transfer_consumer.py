@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+import traceback
+from transport import get_transport
+from model_processing import build_batch_features, predict_fraud, warm_up_models, MissingArtifactError
+from velocity import VelocityStore, SNAPSHOT_PATH
+from feature_pipeline import DAY_SECONDS
+from ledger import (LedgerEngine, COMPLETED, REJECTED_FRAUD, UNKNOWN_ACCOUNT,
+                    UNAUTHORIZED, INSUFFICIENT_FUNDS)
+
+# Micro-batching knobs: bigger batches raise throughput, longer linger adds latency
+BATCH_SIZE = int(os.getenv('FRAUD_BATCH_SIZE', 256))
+BATCH_LINGER_MS = int(os.getenv('FRAUD_BATCH_LINGER_MS', 20))
+FRAUD_THRESHOLD = 0.5
+# Back-off after a failed batch, doubled per consecutive failure
+RETRY_BACKOFF_MS = int(os.getenv('TRANSFER_RETRY_BACKOFF_MS', 100))
+MAX_RETRY_BACKOFF_MS = int(os.getenv('TRANSFER_MAX_RETRY_BACKOFF_MS', 5000))
+
+TRANSFER_TOPIC = 'transfer_requests'
+CONSUMER_GROUP = 'transfer_ledger'
+
+# Sliding per-user/per-account counters feeding Transaction_Count_24H
+VELOCITY_SNAPSHOT_PATH = os.getenv('VELOCITY_SNAPSHOT_PATH', SNAPSHOT_PATH)
+VELOCITY_SNAPSHOT_INTERVAL = int(os.getenv('VELOCITY_SNAPSHOT_INTERVAL', 60))
+velocity = VelocityStore.load(VELOCITY_SNAPSHOT_PATH)
+
+# One ledger writer per consumed partition; balances live only in the database, changed by
+# conditional UPDATEs committed together with a compare-and-set of the partition offset
+ledger = LedgerEngine(fraud_threshold=FRAUD_THRESHOLD)
+
+OUTCOME_MESSAGES = {
+    COMPLETED: "✅ Transfer Completed at offset {offset}",
+    REJECTED_FRAUD: "❌ Fraud detected in transaction {data}",
+    UNKNOWN_ACCOUNT: "❌ Unknown account in transaction {data}",
+    UNAUTHORIZED: "❌ Unauthorized transaction attempt",
+    INSUFFICIENT_FUNDS: "❌ Insufficient funds",
+}
+
+def poll_batch(transport, batch_size=BATCH_SIZE, linger_ms=BATCH_LINGER_MS):
+    """
+    Pulls up to batch_size messages, waiting at most linger_ms for the batch to fill.
+
+    Returns:
+        list: Consumer records in partition order.
+    """
+    batch = []
+    deadline = time.monotonic() + linger_ms / 1000
+    while len(batch) < batch_size:
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            break
+        records = transport.poll(timeout_ms=remaining_ms, max_records=batch_size - len(batch))
+        for partition_messages in records.values():
+            batch.extend(partition_messages)
+    return batch
+
+def transaction_counts_24h(transfers, timestamps):
+    """
+    Transaction_Count_24H per transfer, counting the transfer itself and the
+    earlier ones of the batch, without recording anything in the velocity store.
+    """
+    counts = []
+    in_batch = {}  # user_id -> timestamps of earlier transfers in the batch
+    for data, timestamp in zip(transfers, timestamps):
+        earlier = in_batch.setdefault(data['user_id'], [])
+        recent = sum(1 for other in earlier if other > timestamp - DAY_SECONDS)
+        counts.append(velocity.transaction_count_24h(data['user_id'], now=timestamp) + recent + 1)
+        earlier.append(timestamp)
+    return counts
+
+def process_batch(messages):
+    """
+    Scores a batch of transfer requests in one forward pass, then hands them
+    to the ledger, which applies the authorization and balance checks message
+    by message in partition order and group-commits each partition.
+
+    Messages the ledger already committed (replays after a crash) are
+    dropped up front, and the velocity windows only record transfers once
+    their partition is committed, so a replay is never counted twice.
+
+    Returns:
+        dict: Time spent per stage in ms ("features", "inference", "commit").
+    """
+    messages = [message for message in messages if not ledger.is_committed(message.partition, message.offset)]
+    transfers = [message.value for message in messages]
+    timestamps = [data.get('Time', time.time()) for data in transfers]
+    start = time.perf_counter()
+
+    transaction_counts = transaction_counts_24h(transfers, timestamps)
+    features = build_batch_features(transfers, transaction_counts)
+    features_done = time.perf_counter()
+    fraud_scores = predict_fraud(features)
+    inference_done = time.perf_counter()
+
+    records_by_partition = {}
+    timestamp_of = {}
+    for message, fraud_score, timestamp in zip(messages, fraud_scores, timestamps):
+        records_by_partition.setdefault(message.partition, []).append(
+            (message.offset, message.value, fraud_score))
+        timestamp_of[(message.partition, message.offset)] = timestamp
+
+    def record_velocity(partition_id, committed):
+        for offset, data, _ in committed:
+            velocity.record(data['user_id'], data['from_account'], int(data['amount']),
+                            timestamp_of[(partition_id, offset)])
+
+    outcomes = ledger.process(records_by_partition, on_commit=record_velocity)
+    commit_done = time.perf_counter()
+
+    for offset, data, outcome in outcomes:
+        print(OUTCOME_MESSAGES[outcome].format(offset=offset, data=data))
+
+    return {
+        "features": (features_done - start) * 1000,
+        "inference": (inference_done - features_done) * 1000,
+        "commit": (commit_done - inference_done) * 1000,
+    }
+
+def run_consumer(app, transport=None, stop_event=None):
+    """
+    Consumes transfer requests until stop_event is set (or forever).
+
+    Offsets are committed only after the ledger has committed the batch;
+    replays after a crash are skipped using the DB offsets. A batch that
+    fails (e.g. a lock timeout or a StaleOffsetError) is logged and, after a
+    growing back-off, polled again from the last committed offsets. A
+    MissingArtifactError is raised instead, since no retry can succeed.
+    """
+    transport = transport or get_transport()
+    transport.subscribe(TRANSFER_TOPIC, CONSUMER_GROUP)
+    stop_event = stop_event or threading.Event()
+
+    print(f"🚀 Transfer Consumer Started (batch size {BATCH_SIZE}, linger {BATCH_LINGER_MS} ms). Listening for transactions...")
+
+    with app.app_context():
+        last_snapshot = time.monotonic()
+        failures = 0
+        try:
+            while not stop_event.is_set():
+                try:
+                    messages = poll_batch(transport)
+                    if messages:
+                        process_batch(messages)
+                        transport.commit()
+                    failures = 0
+                except MissingArtifactError:
+                    # Deterministic: every later batch would fail the same way
+                    raise
+                except Exception as exc:
+                    failures += 1
+                    backoff_ms = min(RETRY_BACKOFF_MS * 2 ** (failures - 1), MAX_RETRY_BACKOFF_MS)
+                    print(f"⚠️ Transfer batch failed ({failures} in a row), retrying in {backoff_ms} ms: {exc!r}")
+                    traceback.print_exc()
+                    # Reload the committed offsets and re-poll everything after them
+                    ledger.reset()
+                    transport.rewind()
+                    stop_event.wait(backoff_ms / 1000)
+                if time.monotonic() - last_snapshot >= VELOCITY_SNAPSHOT_INTERVAL:
+                    velocity.save(VELOCITY_SNAPSHOT_PATH)
+                    last_snapshot = time.monotonic()
+        finally:
+            velocity.save(VELOCITY_SNAPSHOT_PATH)
+
+
+if __name__ == "__main__":
+    from main import app
+
+    # Load the models before subscribing so the first batch does not pay the cold start
+    warm_up_models()
+    run_consumer(app)
@@ -0,0 +1,415 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# Same attributes the consumer reads from kafka-python ConsumerRecords
+TransportMessage = namedtuple('TransportMessage', ['topic', 'partition', 'offset', 'key', 'value'])
+
+TRANSPORT = os.getenv('TRANSFER_TRANSPORT', 'kafka')
+KAFKA_BOOTSTRAP_SERVERS = os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092')
+QUEUE_PATH = os.getenv('TRANSFER_QUEUE_PATH', 'transfer_queue.db')
+N_PARTITIONS = int(os.getenv('TRANSFER_PARTITIONS', 4))
+LINGER_MS = int(os.getenv('TRANSFER_PRODUCER_LINGER_MS', 5))
+# Longest a request thread blocks in send() on an unreachable broker or a full buffer
+KAFKA_MAX_BLOCK_MS = int(os.getenv('KAFKA_MAX_BLOCK_MS', 500))
+
+
+def partition_for(key, n_partitions):
+    """Stable partition for a message key, so one key always lands on one partition."""
+    if key is None:
+        return 0
+    return zlib.crc32(key) % n_partitions
+
+
+class Transport(ABC):
+    """
+    Queue used between /api/transfer and the transfer consumer.
+
+    Every backend has the same semantics: send() is asynchronous and batched
+    for up to linger_ms, messages with the same key keep their order within
+    one partition, poll() returns {partition: [messages]} like
+    KafkaConsumer.poll, commit() records the positions of the last poll and
+    rewind() moves back to the committed positions.
+    """
+
+    @abstractmethod
+    def send(self, topic, key, value, on_error=None):
+        """
+        Queues a message; on_error is called with the exception if delivery
+        fails later. Raises if the message cannot be queued at all.
+        """
+
+    @abstractmethod
+    def subscribe(self, topic, group_id):
+        """Starts consuming topic from the group's committed positions."""
+
+    @abstractmethod
+    def poll(self, timeout_ms=0, max_records=500):
+        """Returns {partition: [TransportMessage]}, waiting up to timeout_ms for any."""
+
+    @abstractmethod
+    def commit(self):
+        """Commits the positions after the last poll."""
+
+    @abstractmethod
+    def rewind(self):
+        """Moves back to the committed positions, so uncommitted records are polled again."""
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class LingerBuffer:
+    """
+    Producer-side batching shared by the brokerless transports.
+
+    Sent messages are buffered and written together once linger_ms has
+    passed since the first of them, like the Kafka producer's linger.ms;
+    with linger_ms=0 every message is written right away.
+    """
+
+    def __init__(self, linger_ms, write):
+        self.linger_ms = linger_ms
+        self._write = write
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, item):
+        if self.linger_ms <= 0:
+            with self._write_lock:
+                self._write([item])
+            return
+        with self._lock:
+            self._pending.append(item)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._linger_then_flush, daemon=True)
+                self._flusher.start()
+
+    def _linger_then_flush(self):
+        while True:
+            time.sleep(self.linger_ms / 1000)
+            self.flush()
+            with self._lock:
+                if not self._pending:
+                    self._flusher = None
+                    return
+
+    def flush(self):
+        # Writes are serialized, so batches land in the order they were sent
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                self._write(pending)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+
+class KafkaTransport(Transport):
+    """kafka-python backend, used in production."""
+
+    def __init__(self, bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS, linger_ms=LINGER_MS,
+                 max_block_ms=KAFKA_MAX_BLOCK_MS):
+        self.bootstrap_servers = bootstrap_servers
+        self.linger_ms = linger_ms
+        self.max_block_ms = max_block_ms
+        self._producer = None
+        self._consumer = None
+        self._lock = threading.Lock()
+
+    def _get_producer(self):
+        if self._producer is None:
+            with self._lock:
+                if self._producer is None:
+                    from kafka import KafkaProducer
+                    self._producer = KafkaProducer(
+                        bootstrap_servers=self.bootstrap_servers,
+                        linger_ms=self.linger_ms,
+                        acks=1,
+                        # Bounds metadata waits and full-buffer blocking in send(), and broker
+                        # version probing when the producer is created (NoBrokersAvailable)
+                        max_block_ms=self.max_block_ms,
+                        api_version_auto_timeout_ms=self.max_block_ms,
+                        value_serializer=lambda v: json.dumps(v).encode('utf-8')
+                    )
+        return self._producer
+
+    def send(self, topic, key, value, on_error=None):
+        future = self._get_producer().send(topic, key=key, value=value)
+        if on_error is not None:
+            future.add_errback(on_error)
+
+    def subscribe(self, topic, group_id):
+        from kafka import KafkaConsumer
+        self._consumer = KafkaConsumer(
+            topic,
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=group_id,
+            enable_auto_commit=False,
+            value_deserializer=lambda x: json.loads(x.decode('utf-8'))
+        )
+
+    def poll(self, timeout_ms=0, max_records=500):
+        records = self._consumer.poll(timeout_ms=timeout_ms, max_records=max_records)
+        return {topic_partition.partition: messages for topic_partition, messages in records.items()}
+
+    def commit(self):
+        self._consumer.commit()
+
+    def rewind(self):
+        for topic_partition in self._consumer.assignment():
+            committed = self._consumer.committed(topic_partition)
+            if committed is None:
+                self._consumer.seek_to_beginning(topic_partition)
+            else:
+                self._consumer.seek(topic_partition, committed)
+
+    def flush(self):
+        if self._producer is not None:
+            self._producer.flush()
+
+
+class InProcessTransport(Transport):
+    """
+    Partitioned in-memory log shared by the threads of one process.
+
+    Values are JSON round-tripped like on the wire, so producers and the
+    consumer never share mutable objects. Sends are batched for linger_ms
+    before they become visible to the consumer.
+    """
+
+    def __init__(self, n_partitions=N_PARTITIONS, linger_ms=LINGER_MS):
+        self.n_partitions = n_partitions
+        self._buffer = LingerBuffer(linger_ms, self._append)
+        self._logs = {}  # topic -> list of per-partition message lists
+        self._committed = {}  # (group_id, topic, partition) -> next offset
+        self._positions = {}
+        self._topic = None
+        self._group_id = None
+        self._cond = threading.Condition()
+
+    def _log(self, topic):
+        if topic not in self._logs:
+            self._logs[topic] = [[] for _ in range(self.n_partitions)]
+        return self._logs[topic]
+
+    def send(self, topic, key, value, on_error=None):
+        self._buffer.add((topic, key, json.dumps(value)))
+
+    def _append(self, pending):
+        with self._cond:
+            for topic, key, encoded in pending:
+                partition = partition_for(key, self.n_partitions)
+                log = self._log(topic)[partition]
+                log.append(TransportMessage(topic, partition, len(log), key, encoded))
+            self._cond.notify_all()
+
+    def flush(self):
+        self._buffer.flush()
+
+    def subscribe(self, topic, group_id):
+        with self._cond:
+            self._topic = topic
+            self._group_id = group_id
+            self._log(topic)
+            self._positions = {
+                partition: self._committed.get((group_id, topic, partition), 0)
+                for partition in range(self.n_partitions)
+            }
+
+    def _take(self, max_records):
+        batch = {}
+        logs = self._logs[self._topic]
+        for partition, position in self._positions.items():
+            if max_records <= 0:
+                break
+            messages = logs[partition][position:position + max_records]
+            if messages:
+                batch[partition] = [message._replace(value=json.loads(message.value)) for message in messages]
+                self._positions[partition] = position + len(messages)
+                max_records -= len(messages)
+        return batch
+
+    def poll(self, timeout_ms=0, max_records=500):
+        deadline = time.monotonic() + timeout_ms / 1000
+        with self._cond:
+            while True:
+                batch = self._take(max_records)
+                remaining = deadline - time.monotonic()
+                if batch or remaining <= 0:
+                    return batch
+                self._cond.wait(remaining)
+
+    def commit(self):
+        with self._cond:
+            for partition, position in self._positions.items():
+                self._committed[(self._group_id, self._topic, partition)] = position
+
+    def rewind(self):
+        with self._cond:
+            for partition in self._positions:
+                self._positions[partition] = self._committed.get((self._group_id, self._topic, partition), 0)
+
+    def pending(self, topic):
+        """Messages not yet committed by the subscribed group, including unsent ones, for tests and benchmarks."""
+        with self._cond:
+            logged = sum(
+                len(log) - self._committed.get((self._group_id, topic, partition), 0)
+                for partition, log in enumerate(self._log(topic))
+            )
+        return logged + len(self._buffer)
+
+
+class SqliteTransport(Transport):
+    """
+    Durable partitioned log in a SQLite file (WAL mode), shared by the API and
+    consumer processes on one machine without a broker.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            topic TEXT NOT NULL,
+            partition INTEGER NOT NULL,
+            "offset" INTEGER NOT NULL,
+            key BLOB,
+            value TEXT NOT NULL,
+            PRIMARY KEY (topic, partition, "offset")
+        );
+        CREATE TABLE IF NOT EXISTS consumer_offsets (
+            group_id TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            partition INTEGER NOT NULL,
+            next_offset INTEGER NOT NULL,
+            PRIMARY KEY (group_id, topic, partition)
+        );
+    """
+
+    def __init__(self, path=QUEUE_PATH, n_partitions=N_PARTITIONS, linger_ms=LINGER_MS, poll_interval_ms=5):
+        self.path = path
+        self.n_partitions = n_partitions
+        self.linger_ms = linger_ms
+        self.poll_interval_ms = poll_interval_ms
+        self._local = threading.local()
+        self._buffer = LingerBuffer(linger_ms, self._write)
+        self._positions = {}
+        self._topic = None
+        self._group_id = None
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def send(self, topic, key, value, on_error=None):
+        self._buffer.add((topic, key, json.dumps(value), on_error))
+
+    def flush(self):
+        self._buffer.flush()
+
+    def _write(self, pending):
+        connection = self._connection()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            next_offsets = {}
+            rows = []
+            for topic, key, value, _ in pending:
+                partition = partition_for(key, self.n_partitions)
+                if (topic, partition) not in next_offsets:
+                    next_offsets[(topic, partition)] = connection.execute(
+                        'SELECT COALESCE(MAX("offset") + 1, 0) FROM messages WHERE topic = ? AND partition = ?',
+                        (topic, partition)
+                    ).fetchone()[0]
+                rows.append((topic, partition, next_offsets[(topic, partition)], key, value))
+                next_offsets[(topic, partition)] += 1
+            connection.executemany(
+                'INSERT INTO messages (topic, partition, "offset", key, value) VALUES (?, ?, ?, ?, ?)', rows)
+            connection.execute('COMMIT')
+        except sqlite3.Error as exc:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            for _, _, _, on_error in pending:
+                if on_error is not None:
+                    on_error(exc)
+
+    def subscribe(self, topic, group_id):
+        self._topic = topic
+        self._group_id = group_id
+        committed = dict(self._connection().execute(
+            'SELECT partition, next_offset FROM consumer_offsets WHERE group_id = ? AND topic = ?',
+            (group_id, topic)
+        ).fetchall())
+        self._positions = {partition: committed.get(partition, 0) for partition in range(self.n_partitions)}
+
+    def _take(self, max_records):
+        batch = {}
+        connection = self._connection()
+        for partition, position in self._positions.items():
+            if max_records <= 0:
+                break
+            rows = connection.execute(
+                'SELECT "offset", key, value FROM messages WHERE topic = ? AND partition = ? AND "offset" >= ? '
+                'ORDER BY "offset" LIMIT ?',
+                (self._topic, partition, position, max_records)
+            ).fetchall()
+            if rows:
+                batch[partition] = [
+                    TransportMessage(self._topic, partition, offset, key, json.loads(value))
+                    for offset, key, value in rows
+                ]
+                self._positions[partition] = rows[-1][0] + 1
+                max_records -= len(rows)
+        return batch
+
+    def poll(self, timeout_ms=0, max_records=500):
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            batch = self._take(max_records)
+            if batch or time.monotonic() >= deadline:
+                return batch
+            time.sleep(self.poll_interval_ms / 1000)
+
+    def commit(self):
+        self._connection().executemany(
+            'INSERT OR REPLACE INTO consumer_offsets (group_id, topic, partition, next_offset) VALUES (?, ?, ?, ?)',
+            [(self._group_id, self._topic, partition, position) for partition, position in self._positions.items()]
+        )
+
+    def rewind(self):
+        self.subscribe(self._topic, self._group_id)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Process-wide transport chosen by TRANSFER_TRANSPORT (kafka, memory or sqlite)."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                if TRANSPORT == 'memory':
+                    _transport = InProcessTransport()
+                elif TRANSPORT == 'sqlite':
+                    _transport = SqliteTransport()
+                elif TRANSPORT == 'kafka':
+                    _transport = KafkaTransport()
+                else:
+                    raise ValueError(f"Unknown TRANSFER_TRANSPORT: {TRANSPORT}")
+    return _transport
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+
+# Window name -> (window length in seconds, number of buckets)
+WINDOWS = {
+    "1h": (3600, 60),
+    "24h": (86400, 96),
+    "7d": (604800, 168),
+}
+
+SNAPSHOT_PATH = "velocity_snapshot.json"
+
+
+class RingCounter:
+    """
+    Sliding-window count and amount sum kept in a ring of time buckets.
+
+    Adding an event or reading the totals only touches the buckets that
+    expired since the last call, so updates are O(1) amortized and memory is
+    fixed per key regardless of traffic.
+    """
+
+    __slots__ = ("bucket_seconds", "counts", "amounts", "head", "count", "amount")
+
+    def __init__(self, window_seconds, n_buckets):
+        self.bucket_seconds = window_seconds / n_buckets
+        self.counts = [0] * n_buckets
+        self.amounts = [0] * n_buckets
+        self.head = None  # absolute index of the newest bucket
+        self.count = 0
+        self.amount = 0
+
+    def _advance(self, bucket):
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        n_buckets = len(self.counts)
+        for step in range(1, min(bucket - self.head, n_buckets) + 1):
+            slot = (self.head + step) % n_buckets
+            self.count -= self.counts[slot]
+            self.amount -= self.amounts[slot]
+            self.counts[slot] = 0
+            self.amounts[slot] = 0
+        self.head = bucket
+
+    def add(self, timestamp, amount):
+        bucket = int(timestamp // self.bucket_seconds)
+        self._advance(bucket)
+        if bucket <= self.head - len(self.counts):
+            return  # older than the window
+        slot = bucket % len(self.counts)
+        self.counts[slot] += 1
+        self.amounts[slot] += amount
+        self.count += 1
+        self.amount += amount
+
+    def totals(self, now):
+        self._advance(int(now // self.bucket_seconds))
+        return self.count, self.amount
+
+    def to_dict(self):
+        return {"head": self.head, "counts": self.counts, "amounts": self.amounts}
+
+    @classmethod
+    def from_dict(cls, window_seconds, data):
+        counter = cls(window_seconds, len(data["counts"]))
+        counter.head = data["head"]
+        counter.counts = list(data["counts"])
+        counter.amounts = list(data["amounts"])
+        counter.count = sum(counter.counts)
+        counter.amount = sum(counter.amounts)
+        return counter
+
+
+class VelocityStore:
+    """
+    Per-account and per-user sliding 1h/24h/7d transaction counts and amount
+    sums, updated incrementally as transfers stream through the consumer.
+    """
+
+    def __init__(self, windows=WINDOWS):
+        self.windows = dict(windows)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _counters_for(self, key):
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters[key] = {
+                name: RingCounter(seconds, n_buckets)
+                for name, (seconds, n_buckets) in self.windows.items()
+            }
+        return counters
+
+    def record(self, user_id, account_id, amount, timestamp=None):
+        """Adds one transaction to the user's and the account's windows."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for key in (f"user:{user_id}", f"account:{account_id}"):
+                for counter in self._counters_for(key).values():
+                    counter.add(timestamp, amount)
+
+    def features(self, user_id=None, account_id=None, now=None):
+        """
+        Returns:
+            dict: e.g. {"user_count_24h": 3, "user_amount_24h": 12000, "account_count_1h": 1, ...}
+        """
+        now = time.time() if now is None else now
+        result = {}
+        with self._lock:
+            for prefix, entity_id in (("user", user_id), ("account", account_id)):
+                if entity_id is None:
+                    continue
+                counters = self._counters.get(f"{prefix}:{entity_id}", {})
+                for name in self.windows:
+                    count, amount = counters[name].totals(now) if name in counters else (0, 0)
+                    result[f"{prefix}_count_{name}"] = count
+                    result[f"{prefix}_amount_{name}"] = amount
+        return result
+
+    def transaction_count_24h(self, user_id, now=None):
+        """The Transaction_Count_24H model feature for a user."""
+        return self.features(user_id=user_id, now=now)["user_count_24h"]
+
+    def save(self, path=SNAPSHOT_PATH):
+        with self._lock:
+            data = {
+                "windows": self.windows,
+                "counters": {
+                    key: {name: counter.to_dict() for name, counter in counters.items()}
+                    for key, counters in self._counters.items()
+                },
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        """Restores a snapshot, or returns an empty store if there is none."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        store = cls({name: tuple(window) for name, window in data["windows"].items()})
+        for key, counters in data["counters"].items():
+            store._counters[key] = {
+                name: RingCounter.from_dict(store.windows[name][0], counter)
+                for name, counter in counters.items()
+            }
+        return store
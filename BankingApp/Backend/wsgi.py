@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The gunicorn config migrates the schema (migrate.py) before the workers start.
+"""
+from main import app
+
+application = app
@@ -0,0 +1,73 @@
+"""
+SHA-256 content hashes for knowledge-base chunks.
+
+Chunks are deduplicated on an indexed content_hash column instead of a full
+text comparison. migrate() adds and fills the column on databases created
+before it existed; it runs on every start of quiz_generator.py.
+new_chunks() picks the chunks of a knowledge load that are not stored yet.
+"""
+import hashlib
+from sqlalchemy import inspect, text
+
+BATCH_SIZE = 1000
+# Bound on bind parameters per hash lookup, below SQLite's limit
+LOOKUP_BATCH = 10000
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def new_chunks(documents, split, session, hash_column, batch_size=LOOKUP_BATCH):
+    """
+    The chunks of the documents whose hash is not in hash_column yet, so
+    known chunks are dropped before anything is embedded. A chunk repeated
+    across documents is kept once, under the first category it appears in.
+
+    Args:
+        documents (dict): Category -> text.
+        split (callable): Splits a text into chunks.
+        session: SQLAlchemy session to look the hashes up with.
+        hash_column: The content_hash column of the stored chunks.
+        batch_size (int): Hashes per lookup query.
+
+    Returns:
+        dict: Content hash -> (category, chunk), in document order.
+    """
+    chunks = {}
+    for category, document in documents.items():
+        for chunk in split(document):
+            chunks.setdefault(content_hash(chunk), (category, chunk))
+
+    hashes = list(chunks)
+    for start in range(0, len(hashes), batch_size):
+        known = session.query(hash_column).filter(hash_column.in_(hashes[start:start + batch_size]))
+        for (known_hash,) in known:
+            chunks.pop(known_hash, None)
+    return chunks
+
+
+def migrate(engine):
+    """
+    Returns:
+        bool: Whether the column was added.
+    """
+    inspector = inspect(engine)
+    if 'knowledge_base' not in inspector.get_table_names():
+        return False
+    if any(info['name'] == 'content_hash' for info in inspector.get_columns('knowledge_base')):
+        return False
+
+    select = text(f'SELECT id, content FROM knowledge_base WHERE id > :last_id ORDER BY id LIMIT {BATCH_SIZE}')
+    update = text('UPDATE knowledge_base SET content_hash = :hash WHERE id = :id')
+    with engine.begin() as connection:
+        connection.execute(text('ALTER TABLE knowledge_base ADD COLUMN content_hash VARCHAR(64)'))
+        last_id = 0
+        while True:
+            batch = connection.execute(select, {'last_id': last_id}).all()
+            if not batch:
+                break
+            connection.execute(update, [{'id': row_id, 'hash': content_hash(content)} for row_id, content in batch])
+            last_id = batch[-1][0]
+        connection.execute(text('CREATE INDEX ix_knowledge_base_content_hash ON knowledge_base (content_hash)'))
+    return True
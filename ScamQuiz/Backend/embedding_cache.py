@@ -0,0 +1,128 @@
+"""
+Two-level cache in front of an embedding model.
+
+Embeddings are looked up by (model name, SHA-256 of the text): first in an
+in-process LRU, then in an SQLite file shared by every process and kept
+across restarts. Only texts found in neither are sent to the model, in one
+embed_documents call.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from content_hash import content_hash
+from embedding_storage import EMBEDDING_DTYPE, to_blob, from_blob
+
+# Defaults to the Flask instance folder of quiz_generator.py, beside its database
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "instance", "embedding_cache.sqlite3"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+# Bound on bind parameters per disk lookup
+LOOKUP_BATCH = 500
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DiskEmbeddingStore:
+    """float32 embeddings in SQLite, keyed by model name and text hash."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embedding ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+
+    def get_many(self, model, text_hashes):
+        found = {}
+        for start in range(0, len(text_hashes), LOOKUP_BATCH):
+            batch = text_hashes[start:start + LOOKUP_BATCH]
+            rows = self._connection.execute(
+                f"SELECT text_hash, vector FROM embedding WHERE model = ? AND text_hash IN ({', '.join('?' * len(batch))})",
+                [model, *batch],
+            )
+            found.update((text_hash, from_blob(vector)) for text_hash, vector in rows)
+        return found
+
+    def set_many(self, model, vectors):
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embedding (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, text_hash, to_blob(vector)) for text_hash, vector in vectors.items()],
+            )
+
+
+class CachedEmbeddings:
+    """
+    embed_query/embed_documents of the wrapped embeddings, through the cache.
+
+    Embeddings are returned as read-only float32 arrays.
+
+    Args:
+        embeddings: A LangChain Embeddings object.
+        model_name (str): Part of the cache key, so models never share entries.
+        path (str): SQLite file of the on-disk level, or None for memory only.
+        maxsize (int): Entries kept in the in-memory level.
+    """
+
+    def __init__(self, embeddings, model_name, path=EMBEDDING_CACHE_PATH, maxsize=EMBEDDING_CACHE_SIZE):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory = LRUCache(maxsize)
+        self.disk = DiskEmbeddingStore(path) if path else None
+        self._lock = threading.Lock()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        keys = [content_hash(text) for text in texts]
+        with self._lock:
+            found = {key: self.memory.get(key) for key in set(keys)}
+            missing = [key for key, vector in found.items() if vector is None]
+            if missing and self.disk is not None:
+                stored = self.disk.get_many(self.model_name, missing)
+                for key, vector in stored.items():
+                    found[key] = vector
+                    self.memory.set(key, vector)
+
+        # Each distinct text is embedded once, outside the lock
+        pending = {key: text for key, text in zip(keys, texts) if found[key] is None}
+        if pending:
+            vectors = self.embeddings.embed_documents(list(pending.values()))
+            computed = {}
+            for key, vector in zip(pending, vectors):
+                vector = np.asarray(vector, dtype=EMBEDDING_DTYPE)
+                vector.setflags(write=False)
+                computed[key] = found[key] = vector
+            with self._lock:
+                for key, vector in computed.items():
+                    self.memory.set(key, vector)
+                if self.disk is not None:
+                    self.disk.set_many(self.model_name, computed)
+        return [found[key] for key in keys]
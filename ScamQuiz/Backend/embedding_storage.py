@@ -0,0 +1,44 @@
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Embeddings are stored as raw little-endian float32, 4 bytes per dimension
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def to_blob(embedding):
+    """An embedding (list or array of floats) as float32 bytes."""
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def from_blob(blob):
+    """A read-only float32 view of a stored embedding, without copying."""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+def embedding_matrix(blobs):
+    """Stored embeddings of equal size as one (n, dim) float32 matrix."""
+    blobs = list(blobs)
+    if not blobs:
+        return np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+    return np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE).reshape(len(blobs), -1)
+
+
+class Embedding(TypeDecorator):
+    """
+    A float32 vector in a BLOB/BYTEA column.
+
+    Lists and arrays are accepted on the way in; rows come back as read-only
+    NumPy arrays over the fetched bytes.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_blob(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_blob(value)
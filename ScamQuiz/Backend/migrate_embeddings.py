@@ -0,0 +1,64 @@
+"""
+Converts embedding columns from JSON text to float32 BLOBs.
+
+Each column is rebuilt as a binary column holding the raw float32 bytes of
+the stored JSON list. Columns that are already binary are skipped, so this
+runs on every start of quiz_generator.py.
+"""
+import json
+from sqlalchemy import inspect, text, bindparam, LargeBinary
+from embedding_storage import to_blob
+
+# (table, column)
+EMBEDDING_COLUMNS = [
+    ('knowledge_base', 'embedding'),
+    ('scenario', 'embedding'),
+]
+
+BATCH_SIZE = 1000
+
+
+def _is_migrated(inspector, table, column):
+    for info in inspector.get_columns(table):
+        if info['name'] == column:
+            return isinstance(info['type'], LargeBinary)
+    raise LookupError(f"Column {table}.{column} not found")
+
+
+def migrate_column(connection, table, column):
+    quote = connection.dialect.identifier_preparer.quote
+    table_name, old, new = quote(table), quote(column), quote(f'{column}_blob')
+    blob_type = LargeBinary().compile(dialect=connection.dialect)
+    connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {new} {blob_type}'))
+
+    update = text(f'UPDATE {table_name} SET {new} = :blob WHERE id = :id').bindparams(
+        bindparam('blob', type_=LargeBinary))
+    select = text(f'SELECT id, {old} FROM {table_name} WHERE {old} IS NOT NULL AND id > :last_id '
+                  f'ORDER BY id LIMIT {BATCH_SIZE}')
+    last_id = 0
+    while True:
+        batch = connection.execute(select, {'last_id': last_id}).all()
+        if not batch:
+            break
+        connection.execute(update, [{'id': row_id, 'blob': to_blob(json.loads(value))} for row_id, value in batch])
+        last_id = batch[-1][0]
+
+    connection.execute(text(f'ALTER TABLE {table_name} DROP COLUMN {old}'))
+    connection.execute(text(f'ALTER TABLE {table_name} RENAME COLUMN {new} TO {old}'))
+
+
+def migrate(engine):
+    """
+    Returns:
+        list: "table.column" names that were converted.
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    pending = [
+        (table, column) for table, column in EMBEDDING_COLUMNS
+        if table in tables and not _is_migrated(inspector, table, column)
+    ]
+    with engine.begin() as connection:
+        for table, column in pending:
+            migrate_column(connection, table, column)
+    return [f"{table}.{column}" for table, column in pending]
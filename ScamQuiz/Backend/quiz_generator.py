@@ -3,6 +3,7 @@ import warnings
 import json
 import re
 import random
+import threading
 from typing import List, Dict, Any
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -13,13 +14,25 @@ from dotenv import load_dotenv
 import google.generativeai as genai
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, time
+from vector_index import VectorIndex
+from embedding_storage import Embedding, embedding_matrix
+from migrate_embeddings import migrate as migrate_embeddings
+from content_hash import new_chunks, migrate as migrate_content_hash
+from embedding_cache import CachedEmbeddings
+from similarity import ScenarioSimilarityIndex
 
 # Load environment variables
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API")
+# Chunks embedded per model call when loading knowledge
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+# Encode large knowledge loads in one worker process per core; queries always stay in-process
+EMBEDDING_MULTI_PROCESS = os.getenv("EMBEDDING_MULTI_PROCESS", "false").lower() == "true"
 
 # Flask App and SQLite Configuration
-app = Flask(_name_)
+app = Flask(__name__)
+# Runtime files live in the instance folder next to the database, not in the working directory
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", os.path.join(app.instance_path, "knowledge_index"))
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fintech_quiz.db'
 db = SQLAlchemy(app)
 
@@ -31,7 +44,8 @@ class KnowledgeBase(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     category = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    embedding = db.Column(db.Text, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of content
+    embedding = db.Column(Embedding, nullable=True)  # float32 bytes
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
 
 class QuizQuestion(db.Model):
@@ -47,7 +61,7 @@ class Scenario(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    embedding = db.Column(db.Text, nullable=True)
+    embedding = db.Column(Embedding, nullable=True)  # float32 bytes
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
 
 class Pattern(db.Model):
@@ -63,9 +77,24 @@ scheduler = BackgroundScheduler()
 scheduler.start()
 
 class FintechRAGQuizGenerator:
-    def _init_(self, embedding_model="sentence-transformers/all-MiniLM-L6-v2"):
-        self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
+    def __init__(self, embedding_model="sentence-transformers/all-MiniLM-L6-v2"):
+        self.embedding_model = embedding_model
+        # Every embedding goes through the in-memory and on-disk cache
+        self.embeddings = self._cached_embeddings(multi_process=False)
+        self._bulk_embeddings = None
         self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+        # Request threads and scheduler jobs sync concurrently; each sync reads
+        # last_id and appends after it, so they must not interleave
+        self._sync_lock = threading.Lock()
+
+        # Knowledge-base embeddings for retrieval, kept in sync with the KnowledgeBase table
+        self.index = VectorIndex(VECTOR_INDEX_PATH)
+        self._sync_index()
+
+        # Stored scenarios, for duplicate checks of generated ones
+        self.scenario_similarity = ScenarioSimilarityIndex()
+        self._sync_scenarios()
         
         # Initialize the Google Gemini model
         try:
@@ -102,32 +131,93 @@ class FintechRAGQuizGenerator:
         self.patterns = self._load_patterns_from_db()
         print(f"Loaded {len(self.patterns)} patterns from the database.")
 
+    def _cached_embeddings(self, multi_process):
+        return CachedEmbeddings(
+            HuggingFaceEmbeddings(
+                model_name=self.embedding_model,
+                multi_process=multi_process,
+                encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE},
+            ),
+            self.embedding_model,
+        )
+
+    def bulk_embeddings(self):
+        """
+        Embeddings for knowledge loads. With multi_process, HuggingFaceEmbeddings
+        starts and stops a process pool on every call, which only pays off
+        for large batches; the second model is loaded on the first bulk load.
+        """
+        if not EMBEDDING_MULTI_PROCESS:
+            return self.embeddings
+        if self._bulk_embeddings is None:
+            self._bulk_embeddings = self._cached_embeddings(multi_process=True)
+        return self._bulk_embeddings
+
     def load_sample_knowledge(self, sample_texts: Dict[str, str]):
         with app.app_context():  # Ensure database access within application context
-            for category, text in sample_texts.items():
-                texts = self.text_splitter.split_text(text)
-                for chunk in texts:
-                    embedding = self.embeddings.embed_query(chunk)
-                    existing = KnowledgeBase.query.filter_by(content=chunk).first()
-                    if not existing:
-                        new_entry = KnowledgeBase(category=category, content=chunk, embedding=json.dumps(embedding))
-                        db.session.add(new_entry)
-            db.session.commit()
-            print(f"Loaded knowledge from {len(sample_texts)} documents into the database.")
+            chunks = list(new_chunks(sample_texts, self.text_splitter.split_text,
+                                     db.session, KnowledgeBase.content_hash).items())
+            embedder = self.bulk_embeddings()
+            for start in range(0, len(chunks), EMBEDDING_BATCH_SIZE):
+                batch = chunks[start:start + EMBEDDING_BATCH_SIZE]
+                embeddings = embedder.embed_documents([chunk for _, (_, chunk) in batch])
+                db.session.execute(db.insert(KnowledgeBase), [
+                    {"category": category, "content": chunk, "content_hash": chunk_hash, "embedding": embedding}
+                    for (chunk_hash, (category, chunk)), embedding in zip(batch, embeddings)
+                ])
+                # Each batch is committed, so a failed load keeps what it already embedded
+                db.session.commit()
+            print(f"Loaded {len(chunks)} new chunks from {len(sample_texts)} documents into the database.")
+        self._sync_index()
 
     def add_user_scenario(self, title: str, content: str) -> int:
         with app.app_context():  # Ensure database access within application context
             embedding = self.embeddings.embed_query(content)
-            new_scenario = Scenario(title=title, content=content, embedding=json.dumps(embedding))
+            new_scenario = Scenario(title=title, content=content, embedding=embedding)
             db.session.add(new_scenario)
             db.session.commit()
-            return new_scenario.id
+            scenario_id = new_scenario.id
+        self._sync_scenarios()
+        return scenario_id
+
+    def _sync_index(self):
+        """Adds knowledge-base rows written since the index was last updated."""
+        with self._sync_lock, app.app_context():
+            max_id = db.session.query(db.func.max(KnowledgeBase.id)).scalar() or 0
+            if max_id < self.index.last_id:
+                # The database was recreated, the indexed ids no longer exist
+                self.index.clear()
+            # Raw bytes, joined into one matrix without decoding each row
+            rows = (db.session.query(KnowledgeBase.id, db.type_coerce(KnowledgeBase.embedding, db.LargeBinary))
+                    .filter(KnowledgeBase.id > self.index.last_id, KnowledgeBase.embedding.isnot(None))
+                    .order_by(KnowledgeBase.id)
+                    .all())
+            if rows:
+                ids, blobs = zip(*rows)
+                self.index.add(ids, embedding_matrix(blobs))
+
+    def _sync_scenarios(self):
+        """Adds scenarios written since the last sync to the duplicate checks."""
+        with self._sync_lock, app.app_context():
+            max_id = db.session.query(db.func.max(Scenario.id)).scalar() or 0
+            if max_id < self.scenario_similarity.last_id:
+                self.scenario_similarity.clear()
+            rows = (db.session.query(Scenario.id, Scenario.content, Scenario.embedding)
+                    .filter(Scenario.id > self.scenario_similarity.last_id)
+                    .order_by(Scenario.id)
+                    .all())
+            if rows:
+                self.scenario_similarity.add(*zip(*rows))
 
     def _find_relevant_context(self, query_text: str, k: int = 3) -> str:
+        self._sync_index()
+        query_embedding = self.embeddings.embed_query(query_text)
+        ids, _ = self.index.search(query_embedding, k)
         with app.app_context():  # Ensure database access within application context
-            query_embedding = self.embeddings.embed_query(query_text)
-            relevant_docs = KnowledgeBase.query.limit(k).all()
-            return "\n\n".join([doc.content for doc in relevant_docs])
+            contents = dict(db.session.query(KnowledgeBase.id, KnowledgeBase.content)
+                            .filter(KnowledgeBase.id.in_(ids.tolist())))
+        # Most similar chunk first
+        return "\n\n".join([contents[doc_id] for doc_id in ids.tolist() if doc_id in contents])
 
     def _call_llm_with_google(self, prompt: str) -> str:
         safety_settings = [
@@ -271,16 +361,13 @@ class FintechRAGQuizGenerator:
                         raw_response = self._call_llm_with_google(prompt)
                         scenario = json.loads(raw_response)
                         
-                        # Check if this scenario is too similar to previous ones
-                        if previous_scenarios:
-                            similarity_scores = [
-                                self._calculate_similarity(scenario['content'], prev['content'])
-                                for prev in previous_scenarios
-                            ]
-                            if max(similarity_scores) > 0.8:  # Threshold for similarity
-                                if attempt == max_attempts - 1:
-                                    raise ValueError("Failed to generate unique scenario")
-                                continue
+                        # Check if this scenario is too similar to any stored one, including the previous ones
+                        self._sync_scenarios()
+                        embedding = self.embeddings.embed_query(scenario['content'])
+                        if self.scenario_similarity.is_duplicate(scenario['content'], embedding):
+                            if attempt == max_attempts - 1:
+                                raise ValueError("Failed to generate unique scenario")
+                            continue
                         
                         scenario_id = self.add_user_scenario(scenario["title"], scenario["content"])
                         scenario_with_metadata = {**scenario, "id": scenario_id, "pattern_id": pattern_id}
@@ -302,24 +389,11 @@ class FintechRAGQuizGenerator:
             
             return scenarios
 
-    def _calculate_similarity(self, text1: str, text2: str) -> float:
-        """Calculate similarity between two texts using their embeddings."""
-        try:
-            embedding1 = self.embeddings.embed_query(text1)
-            embedding2 = self.embeddings.embed_query(text2)
-            
-            # Calculate cosine similarity
-            dot_product = sum(a * b for a, b in zip(embedding1, embedding2))
-            norm1 = sum(a * a for a in embedding1) ** 0.5
-            norm2 = sum(b * b for b in embedding2) ** 0.5
-            return dot_product / (norm1 * norm2)
-        except Exception as e:
-            print(f"Error calculating similarity: {e}")
-            return 0.0
-
 # Initialize the FintechRAGQuizGenerator within the application context
 with app.app_context():
     db.create_all()  # Ensure all tables are created
+    migrate_embeddings(db.engine)  # JSON text embeddings from older databases
+    migrate_content_hash(db.engine)
     fintech_quiz_generator = FintechRAGQuizGenerator()
 
 @app.route("/load_knowledge", methods=["POST"])
@@ -423,7 +497,7 @@ def generate_quiz_job():
 
     return jsonify({"quiz_questions": all_questions}), 200
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     with app.app_context():
         db.create_all()
         # Check if patterns exist, if not initialize them
@@ -0,0 +1,141 @@
+"""
+Vectorized similarity and near-duplicate detection for scenarios.
+
+Embeddings are normalized once when they are added, so comparing a new
+scenario with every stored one is a single matrix-vector product. Texts are
+also MinHashed over word shingles and bucketed with locality-sensitive
+hashing (LSH), which finds near-verbatim rewrites among thousands of stored
+scenarios by looking only at the rows that share a bucket.
+"""
+import os
+import re
+import zlib
+import numpy as np
+from vector_index import normalize
+
+SCENARIO_SIMILARITY_THRESHOLD = float(os.getenv("SCENARIO_SIMILARITY_THRESHOLD", 0.8))
+SCENARIO_JACCARD_THRESHOLD = float(os.getenv("SCENARIO_JACCARD_THRESHOLD", 0.5))
+MINHASH_PERMUTATIONS = 128
+# 32 bands of 4 rows: pairs above a Jaccard similarity of about 0.4 share a bucket
+LSH_BANDS = 32
+SHINGLE_SIZE = 3
+# Smallest prime above 2**32, so (a * x + b) mod p wraps often enough to scramble the order of x
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.iinfo(np.uint64).max
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """CRC32 hashes of the distinct word n-grams of a text."""
+    words = re.findall(r"\w+", text.lower())
+    grams = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+    return np.array(sorted(zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64)
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes (a * x + b) mod a prime."""
+
+    def __init__(self, num_perm=MINHASH_PERMUTATIONS, seed=1):
+        rng = np.random.default_rng(seed)
+        # a, b and the 32-bit shingle hashes keep a * x + b below 2**64
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = shingles(text)
+        if len(hashes) == 0:
+            return np.full(len(self.a), _MAX_HASH, dtype=np.uint64)
+        return ((np.outer(hashes, self.a) + self.b) % _PRIME).min(axis=0)
+
+
+class ScenarioSimilarityIndex:
+    """
+    Stored scenarios for duplicate checks of newly generated ones.
+
+    Args:
+        threshold (float): Cosine similarity above which scenarios are duplicates.
+        jaccard_threshold (float): Estimated shingle Jaccard similarity above
+            which scenarios are near duplicates.
+    """
+
+    def __init__(self, threshold=SCENARIO_SIMILARITY_THRESHOLD, jaccard_threshold=SCENARIO_JACCARD_THRESHOLD):
+        self.threshold = threshold
+        self.jaccard_threshold = jaccard_threshold
+        self.minhasher = MinHasher()
+        self.rows_per_band = MINHASH_PERMUTATIONS // LSH_BANDS
+        self.clear()
+
+    def clear(self):
+        self.last_id = 0
+        self._embedding_ids = []
+        self._matrix = None
+        self._count = 0
+        self._signatures = {}
+        self._buckets = [{} for _ in range(LSH_BANDS)]
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes()
+                for band in range(LSH_BANDS)]
+
+    def _add_embeddings(self, ids, embeddings):
+        vectors = normalize(embeddings)
+        end = self._count + len(vectors)
+        if self._matrix is None or end > len(self._matrix):
+            capacity = max(256, end, 2 * (len(self._matrix) if self._matrix is not None else 0))
+            matrix = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            if self._count:
+                matrix[:self._count] = self._matrix[:self._count]
+            self._matrix = matrix
+        self._matrix[self._count:end] = vectors
+        self._embedding_ids.extend(ids)
+        self._count = end
+
+    def add(self, ids, contents, embeddings):
+        """Adds scenarios; rows whose embedding is None are only used for near-duplicate checks."""
+        with_embedding = [(scenario_id, embedding) for scenario_id, embedding in zip(ids, embeddings)
+                          if embedding is not None]
+        if with_embedding:
+            embedding_ids, vectors = zip(*with_embedding)
+            self._add_embeddings(list(embedding_ids), vectors)
+        for scenario_id, content in zip(ids, contents):
+            signature = self.minhasher.signature(content)
+            self._signatures[scenario_id] = signature
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                bucket.setdefault(key, []).append(scenario_id)
+            self.last_id = max(self.last_id, scenario_id)
+
+    def most_similar(self, embedding):
+        """
+        Returns:
+            tuple: (scenario id, cosine similarity) of the closest stored
+            scenario, or (None, 0.0) when none is stored.
+        """
+        if not self._count:
+            return None, 0.0
+        scores = self._matrix[:self._count] @ normalize(embedding)[0]
+        best = int(np.argmax(scores))
+        return self._embedding_ids[best], float(scores[best])
+
+    def near_duplicates(self, content):
+        """
+        Returns:
+            list: (scenario id, estimated Jaccard similarity) of stored
+            scenarios sharing at least one LSH bucket and above the threshold.
+        """
+        signature = self.minhasher.signature(content)
+        # Only texts without a single word get the empty signature; they match nothing
+        if signature[0] == _MAX_HASH:
+            return []
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        matches = []
+        for scenario_id in candidates:
+            estimate = float(np.mean(self._signatures[scenario_id] == signature))
+            if estimate >= self.jaccard_threshold:
+                matches.append((scenario_id, estimate))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def is_duplicate(self, content, embedding=None):
+        if embedding is not None and self.most_similar(embedding)[1] > self.threshold:
+            return True
+        return bool(self.near_duplicates(content))
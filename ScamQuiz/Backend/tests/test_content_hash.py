@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+
+from content_hash import content_hash, migrate, new_chunks
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'quiz.db'}")
+
+
+def test_migrate_adds_and_fills_the_hash_column(engine, monkeypatch):
+    monkeypatch.setattr('content_hash.BATCH_SIZE', 2)
+    contents = ["urgent transfer", "prize claim", "urgent transfer", "courier fee", "refund call"]
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE knowledge_base (id INTEGER PRIMARY KEY, content TEXT)"))
+        connection.execute(text("INSERT INTO knowledge_base (content) VALUES (:content)"),
+                           [{"content": content} for content in contents])
+
+    assert migrate(engine) is True
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT content, content_hash FROM knowledge_base ORDER BY id")).all()
+    assert [row_hash for _, row_hash in rows] == [content_hash(content) for content in contents]
+    assert 'ix_knowledge_base_content_hash' in {index['name'] for index in inspect(engine).get_indexes('knowledge_base')}
+    assert migrate(engine) is False
+
+
+def test_migrate_skips_a_missing_table(engine):
+    assert migrate(engine) is False
+
+
+@pytest.fixture
+def knowledge_base(engine):
+    table = Table('knowledge_base', MetaData(),
+                  Column('id', Integer, primary_key=True),
+                  Column('content', Text),
+                  Column('content_hash', String(64), index=True))
+    table.metadata.create_all(engine)
+    return table
+
+
+def test_new_chunks_drops_repeated_and_stored_chunks(engine, knowledge_base):
+    with engine.begin() as connection:
+        connection.execute(knowledge_base.insert(), [
+            {'content': chunk, 'content_hash': content_hash(chunk)} for chunk in ("stored one", "stored two")])
+    documents = {
+        'phishing': "fake link|stored one|urgent call",
+        'vishing': "urgent call|caller id|stored two|bank agent|otp request",
+    }
+    lookups = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: lookups.append(args[2]))
+
+    with Session(engine) as session:
+        chunks = new_chunks(documents, lambda document: document.split('|'), session,
+                            knowledge_base.c.content_hash, batch_size=3)
+
+    assert list(chunks.values()) == [
+        ('phishing', "fake link"), ('phishing', "urgent call"),
+        ('vishing', "caller id"), ('vishing', "bank agent"), ('vishing', "otp request"),
+    ]
+    assert list(chunks) == [content_hash(chunk) for _, chunk in chunks.values()]
+    # 7 distinct chunks looked up 3 at a time
+    assert len(lookups) == 3
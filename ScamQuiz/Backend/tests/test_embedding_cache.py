@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from embedding_cache import CachedEmbeddings, LRUCache
+
+
+class FakeEmbeddings:
+    """Deterministic embeddings that record every text sent to the model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+@pytest.fixture
+def model():
+    return FakeEmbeddings()
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_each_distinct_text_is_embedded_once(model):
+    cached = CachedEmbeddings(model, "fake", path=None)
+
+    first = cached.embed_documents(["phishing", "vishing", "phishing"])
+    second = cached.embed_documents(["vishing", "smishing"])
+    query = cached.embed_query("phishing")
+
+    assert model.calls == [["phishing", "vishing"], ["smishing"]]
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(second[0], first[1])
+    np.testing.assert_array_equal(query, first[0])
+    assert query.dtype == np.float32 and not query.flags.writeable
+
+
+def test_disk_level_is_shared_across_instances(model, tmp_path):
+    path = str(tmp_path / "cache" / "embeddings.sqlite3")
+    expected = CachedEmbeddings(model, "fake", path=path).embed_documents(["phishing", "vishing"])
+
+    other_model = FakeEmbeddings()
+    restarted = CachedEmbeddings(other_model, "fake", path=path)
+    vectors = restarted.embed_documents(["vishing", "phishing", "smishing"])
+
+    assert other_model.calls == [["smishing"]]
+    np.testing.assert_array_equal(vectors[0], expected[1])
+    np.testing.assert_array_equal(vectors[1], expected[0])
+
+
+def test_disk_hits_refill_the_memory_level(model, tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    CachedEmbeddings(model, "fake", path=path).embed_documents(["a", "b", "c"])
+
+    cached = CachedEmbeddings(FakeEmbeddings(), "fake", path=path, maxsize=2)
+    cached.embed_documents(["a", "b", "c"])
+
+    assert len(cached.memory) == 2
+
+
+def test_models_do_not_share_entries(model, tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    CachedEmbeddings(model, "fake", path=path).embed_query("phishing")
+
+    other_model = FakeEmbeddings()
+    CachedEmbeddings(other_model, "other", path=path).embed_query("phishing")
+
+    assert other_model.calls == [["phishing"]]
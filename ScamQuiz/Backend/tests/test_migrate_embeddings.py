@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, text, LargeBinary
+
+from embedding_storage import from_blob
+from migrate_embeddings import migrate
+
+EMBEDDINGS = {1: [0.5, -1.25, 3.0], 2: [1e-3, 2.0, -0.75]}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'quiz.db'}")
+    with engine.begin() as connection:
+        for table in ("knowledge_base", "scenario"):
+            connection.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, content TEXT, embedding TEXT)"))
+            connection.execute(text(f"INSERT INTO {table} (id, content, embedding) VALUES (:id, :content, :embedding)"), [
+                {"id": row_id, "content": f"row {row_id}", "embedding": json.dumps(embedding)}
+                for row_id, embedding in EMBEDDINGS.items()
+            ])
+            connection.execute(text(f"INSERT INTO {table} (id, content) VALUES (3, 'no embedding')"))
+    return engine
+
+
+def column_type(engine, table, column):
+    return next(info['type'] for info in inspect(engine).get_columns(table) if info['name'] == column)
+
+
+def test_json_embeddings_become_float32_blobs(engine):
+    assert migrate(engine) == ["knowledge_base.embedding", "scenario.embedding"]
+
+    for table in ("knowledge_base", "scenario"):
+        assert isinstance(column_type(engine, table, "embedding"), LargeBinary)
+        with engine.connect() as connection:
+            rows = dict(connection.execute(text(f"SELECT id, embedding FROM {table}")).all())
+        assert rows[3] is None
+        for row_id, embedding in EMBEDDINGS.items():
+            np.testing.assert_array_equal(from_blob(rows[row_id]), np.float32(embedding))
+
+
+def test_migrate_is_idempotent(engine):
+    migrate(engine)
+    with engine.connect() as connection:
+        before = connection.execute(text("SELECT id, content, embedding FROM knowledge_base ORDER BY id")).all()
+
+    assert migrate(engine) == []
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT id, content, embedding FROM knowledge_base ORDER BY id")).all() == before
+
+
+def test_missing_tables_are_skipped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+
+    assert migrate(engine) == []
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from similarity import MinHasher, ScenarioSimilarityIndex, shingles
+
+WORDS = ("bank account transfer urgent verify password refund prize gift card caller email link "
+         "otp courier parcel fee lottery investment crypto wallet support agent").split()
+
+
+def random_text(rng, n_words):
+    return " ".join(rng.choice(WORDS, n_words))
+
+
+def jaccard(a, b):
+    a, b = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(a & b) / len(a | b)
+
+
+def test_minhash_estimates_jaccard():
+    rng = np.random.default_rng(0)
+    minhasher = MinHasher()
+    errors = []
+    for _ in range(50):
+        base = random_text(rng, 60)
+        words = base.split()
+        # Replace a random share of the words to spread the true similarity
+        for i in rng.choice(len(words), rng.integers(0, 40), replace=False):
+            words[i] = rng.choice(WORDS)
+        other = " ".join(words)
+        estimate = np.mean(minhasher.signature(base) == minhasher.signature(other))
+        errors.append(estimate - jaccard(base, other))
+
+    # 128 permutations: standard error at most 0.5 / sqrt(128) ~ 0.044
+    assert abs(np.mean(errors)) < 0.02
+    assert np.std(errors) < 0.07
+
+
+def test_finds_near_duplicate_rewrites():
+    rng = np.random.default_rng(1)
+    texts = [random_text(rng, 80) for _ in range(500)]
+    index = ScenarioSimilarityIndex()
+    index.add(list(range(1, len(texts) + 1)), texts, [None] * len(texts))
+
+    rewrite = texts[41] + " please act now"
+    matches = index.near_duplicates(rewrite)
+
+    assert matches[0][0] == 42
+    assert matches[0][1] == pytest.approx(jaccard(texts[41], rewrite), abs=0.15)
+    assert index.is_duplicate(rewrite)
+    assert not index.is_duplicate(random_text(rng, 80))
+
+
+def test_texts_without_words_match_nothing():
+    index = ScenarioSimilarityIndex()
+    index.add([1], ["!!!"], [None])
+
+    assert index.near_duplicates("???") == []
+
+
+def test_embedding_duplicates_use_cosine_threshold():
+    index = ScenarioSimilarityIndex(threshold=0.9)
+    index.add([1, 2], ["first", "second"], [np.array([1.0, 0.0]), np.array([0.0, 1.0])])
+
+    assert index.most_similar(np.array([0.1, 1.0]))[0] == 2
+    assert index.is_duplicate("unrelated words here", np.array([1.0, 0.05]))
+    assert not index.is_duplicate("unrelated words here", np.array([1.0, 1.0]))
@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+
+from vector_index import VectorIndex
+
+
+def random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_add_skips_indexed_ids(tmp_path):
+    index = VectorIndex(str(tmp_path / "index"))
+    vectors = random_vectors(10)
+    index.add(range(1, 6), vectors[:5])
+
+    # A second sync that read the same last_id sends overlapping rows
+    index.add(range(3, 11), vectors[2:])
+
+    assert len(index) == 10 and index.last_id == 10
+    ids, _ = index.search(vectors[4], k=10)
+    assert sorted(ids.tolist()) == list(range(1, 11))
+
+
+def test_concurrent_adds_index_each_row_once(tmp_path):
+    index = VectorIndex(str(tmp_path / "index"))
+    vectors = random_vectors(4000, seed=1)
+
+    def sync():
+        # Every thread syncs all rows in chunks, crossing several capacity doublings
+        for start in range(0, len(vectors), 250):
+            index.add(range(start + 1, start + 251), vectors[start:start + 250])
+            index.search(vectors[start], k=3)
+
+    threads = [threading.Thread(target=sync) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(index) == len(vectors)
+    ids, scores = index.search(vectors[1234], k=1, exact=True)
+    assert ids.tolist() == [1235] and scores[0] > 0.999
+
+
+def clustered_vectors(n, n_clusters=20, dim=16, seed=2):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    labels = rng.integers(0, n_clusters, n)
+    return (centers[labels] + 0.1 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_ivf_search_scans_a_subset_and_matches_exact_search(tmp_path):
+    vectors = clustered_vectors(2000)
+    index = VectorIndex(str(tmp_path / "index"), ivf_min_rows=1000, nprobe=4)
+    index.add(range(1, 2001), vectors)
+    assert index._ivf is not None
+
+    queries = vectors[::100]
+    hits = 0
+    for i, query in zip(range(1, 2001, 100), queries):
+        assert len(index._ivf.candidates(query / np.linalg.norm(query), index.nprobe)) < len(index)
+        ids, scores = index.search(query, k=5)
+        exact_ids, exact_scores = index.search(query, k=5, exact=True)
+        # The query row itself is always in its own cluster
+        assert ids[0] == exact_ids[0] == i
+        assert np.all(np.diff(scores) <= 0)
+        hits += len(set(ids.tolist()) & set(exact_ids.tolist()))
+    assert hits / (5 * len(queries)) >= 0.9
+
+
+def test_small_index_searches_exactly(tmp_path):
+    vectors = random_vectors(50)
+    index = VectorIndex(str(tmp_path / "index"), ivf_min_rows=100)
+    index.add(range(1, 51), vectors)
+
+    ids, scores = index.search(vectors[7], k=50)
+
+    assert index._ivf is None
+    assert ids[0] == 8 and sorted(ids.tolist()) == list(range(1, 51))
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.sort(normalized @ normalized[7])[::-1]
+    np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_reopened_index_keeps_rows_and_clusters(tmp_path):
+    path = str(tmp_path / "index")
+    vectors = clustered_vectors(1500)
+    index = VectorIndex(path, ivf_min_rows=1000, nprobe=4)
+    index.add(range(1, 1201), vectors[:1200])
+    expected = index.search(vectors[10], k=5)
+    del index
+
+    reopened = VectorIndex(path, ivf_min_rows=1000, nprobe=4)
+
+    assert len(reopened) == 1200 and reopened.last_id == 1200 and reopened.dim == 16
+    assert reopened._ivf is not None
+    ids, scores = reopened.search(vectors[10], k=5)
+    assert ids.tolist() == expected[0].tolist()
+    np.testing.assert_allclose(scores, expected[1])
+
+    # Appending continues after the persisted rows
+    reopened.add(range(1, 1501), vectors)
+    assert len(reopened) == 1500
+    assert reopened.search(vectors[1400], k=1, exact=True)[0].tolist() == [1401]
+    assert len(VectorIndex(path)) == 1500
+
+
+def test_clear_removes_the_files(tmp_path):
+    path = str(tmp_path / "index")
+    index = VectorIndex(path)
+    index.add([1, 2], random_vectors(2))
+
+    index.clear()
+
+    assert len(index) == 0 and index.last_id == 0
+    assert len(VectorIndex(path)) == 0
+    assert index.search(random_vectors(1)[0], k=3)[0].size == 0
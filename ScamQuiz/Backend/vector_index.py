@@ -0,0 +1,255 @@
+"""
+On-disk vector index for knowledge-base retrieval.
+
+Embeddings are kept L2-normalized in one contiguous float32 matrix
+(vectors.npy) that is memory-mapped, next to the row id of every vector
+(ids.npy). Cosine similarity is then a single matrix-vector product over
+the mapped matrix. Once the index holds IVF_MIN_ROWS vectors an inverted
+file (IVF) is trained on top: a spherical k-means over the vectors, so a
+query only scans the rows of its nprobe closest clusters.
+
+The matrix is over-allocated and grown by doubling, so adding rows is an
+in-place write. One process should write to an index directory at a time;
+within it, a lock serializes add(), clear() and search(), since growing the
+matrix swaps the mapped files.
+"""
+import os
+import threading
+import numpy as np
+
+INITIAL_CAPACITY = 1024
+IVF_MIN_ROWS = int(os.getenv("VECTOR_INDEX_IVF_MIN_ROWS", 20000))
+IVF_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", 8))
+# Retrain the clusters once the index has grown this much since training
+IVF_RETRAIN_GROWTH = 2.0
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_BATCH = 8192
+
+
+def normalize(vectors):
+    """Rows scaled to unit length as float32; zero rows stay zero."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _assign(vectors, centroids):
+    """Closest centroid per normalized row, in batches to bound memory."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BATCH):
+        batch = np.asarray(vectors[start:start + ASSIGN_BATCH])
+        assignments[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(vectors, n_clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """k-means on the unit sphere (cosine distance) over a sample of the rows."""
+    rng = np.random.default_rng(seed)
+    n_sample = min(len(vectors), n_clusters * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), n_sample, replace=False))])
+    centroids = sample[rng.choice(n_sample, n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        # Empty clusters are reseeded from random rows
+        empty = np.bincount(assignments, minlength=n_clusters) == 0
+        sums[empty] = sample[rng.choice(n_sample, int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+class _InvertedFile:
+    """Cluster centroids and the cluster of every indexed row."""
+
+    def __init__(self, centroids, assignments, trained_rows):
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_rows = trained_rows
+        self._order = None
+        self._offsets = None
+
+    @classmethod
+    def train(cls, vectors):
+        n_clusters = max(1, int(np.sqrt(len(vectors))))
+        centroids = spherical_kmeans(vectors, n_clusters)
+        return cls(centroids, _assign(vectors, centroids), len(vectors))
+
+    def add(self, vectors):
+        self.assignments = np.concatenate([self.assignments, _assign(vectors, self.centroids)])
+        self._order = None
+
+    def candidates(self, query, nprobe):
+        """Row positions in the nprobe clusters closest to the query, in ascending order."""
+        if self._order is None:
+            self._order = np.argsort(self.assignments, kind="stable")
+            self._offsets = np.searchsorted(self.assignments[self._order], np.arange(len(self.centroids) + 1))
+        scores = self.centroids @ query
+        probe = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        rows = np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in probe])
+        return np.sort(rows)
+
+
+class VectorIndex:
+    """
+    Top-k cosine search over (id, embedding) pairs persisted in a directory.
+
+    Args:
+        path (str): Directory holding the index files; created if missing.
+        ivf_min_rows (int): Row count from which the IVF is used.
+        nprobe (int): Clusters scanned per IVF query.
+    """
+
+    def __init__(self, path, ivf_min_rows=IVF_MIN_ROWS, nprobe=IVF_NPROBE):
+        self.path = path
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.count = 0
+        self.last_id = 0
+        self._vectors = None
+        self._ids = None
+        self._ivf = None
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._open()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _open(self):
+        if not os.path.exists(self._file("vectors.npy")):
+            return
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+        self._ids = np.load(self._file("ids.npy"), mmap_mode="r+")
+        # Rows fill the matrix from the top, unused capacity has id -1
+        self.count = int(np.count_nonzero(self._ids >= 0))
+        self.last_id = int(self._ids[:self.count].max()) if self.count else 0
+        if os.path.exists(self._file("ivf.npz")):
+            with np.load(self._file("ivf.npz")) as ivf:
+                self._ivf = _InvertedFile(ivf["centroids"], ivf["assignments"], int(ivf["trained_rows"]))
+
+    @property
+    def dim(self):
+        return None if self._vectors is None else self._vectors.shape[1]
+
+    def __len__(self):
+        return self.count
+
+    def _allocate(self, capacity, dim):
+        """Writes new files of the given capacity holding the current rows, then swaps them in."""
+        vectors_tmp, ids_tmp = self._file("vectors.tmp.npy"), self._file("ids.tmp.npy")
+        vectors = np.lib.format.open_memmap(vectors_tmp, mode="w+", dtype=np.float32, shape=(capacity, dim))
+        ids = np.lib.format.open_memmap(ids_tmp, mode="w+", dtype=np.int64, shape=(capacity,))
+        ids[:] = -1
+        if self.count:
+            vectors[:self.count] = self._vectors[:self.count]
+            ids[:self.count] = self._ids[:self.count]
+        vectors.flush()
+        ids.flush()
+        del vectors, ids
+        self._vectors = self._ids = None
+        os.replace(vectors_tmp, self._file("vectors.npy"))
+        os.replace(ids_tmp, self._file("ids.npy"))
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+        self._ids = np.load(self._file("ids.npy"), mmap_mode="r+")
+
+    def _save_ivf(self):
+        if self._ivf is None:
+            if os.path.exists(self._file("ivf.npz")):
+                os.remove(self._file("ivf.npz"))
+            return
+        np.savez(self._file("ivf.npz"), centroids=self._ivf.centroids,
+                 assignments=self._ivf.assignments, trained_rows=self._ivf.trained_rows)
+
+    def add(self, ids, vectors):
+        """
+        Appends embeddings for the given row ids. Ids up to last_id are
+        already indexed and skipped, so two syncs racing over the same rows
+        add them once.
+
+        Raises:
+            ValueError: If the embedding size differs from the indexed one.
+        """
+        vectors = normalize(vectors)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        with self._lock:
+            if self.dim is not None and vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+            new = ids > self.last_id
+            if new.any():
+                self._append(ids[new], vectors[new])
+
+    def _append(self, ids, vectors):
+        end = self.count + len(ids)
+        if self._vectors is None or end > len(self._vectors):
+            capacity = max(INITIAL_CAPACITY, len(self._vectors) if self._vectors is not None else 0)
+            while capacity < end:
+                capacity *= 2
+            self._allocate(capacity, vectors.shape[1])
+
+        self._vectors[self.count:end] = vectors
+        self._ids[self.count:end] = ids
+        self._vectors.flush()
+        self._ids.flush()
+        self.count = end
+        self.last_id = max(self.last_id, int(ids.max()))
+
+        if self.count < self.ivf_min_rows:
+            return
+        if self._ivf is None or self.count >= self._ivf.trained_rows * IVF_RETRAIN_GROWTH:
+            self._ivf = _InvertedFile.train(self._vectors[:self.count])
+        else:
+            self._ivf.add(vectors)
+        self._save_ivf()
+
+    def clear(self):
+        """Drops every row, e.g. when the database the index mirrors was recreated."""
+        with self._lock:
+            for name in ("vectors.npy", "ids.npy", "ivf.npz"):
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            self.count = 0
+            self.last_id = 0
+            self._vectors = self._ids = self._ivf = None
+
+    def search(self, query, k=3, exact=False):
+        """
+        The k indexed rows most similar to the query embedding.
+
+        Args:
+            query (list): Query embedding; it does not need to be normalized.
+            k (int): Number of results.
+            exact (bool): Scan every row even when the IVF is trained.
+
+        Returns:
+            tuple: (ids, cosine similarities) as arrays, most similar first.
+        """
+        query = normalize(query)[0]
+        with self._lock:
+            return self._search(query, k, exact)
+
+    def _search(self, query, k, exact):
+        k = min(k, self.count)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = None
+        if self._ivf is not None and not exact and self.nprobe < len(self._ivf.centroids):
+            rows = self._ivf.candidates(query, self.nprobe)
+            if len(rows) < k:
+                rows = None
+        if rows is None:
+            scores = self._vectors[:self.count] @ query
+        else:
+            scores = self._vectors[rows] @ query
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        positions = top if rows is None else rows[top]
+        return np.array(self._ids[positions]), scores[top]